@@ -0,0 +1,177 @@
+"""
+Файл с замерами скорости генерации, поиска пути, ввода/вывода и отрисовки
+без окна (SDL dummy), результаты сохраняются в JSON или CSV
+
+Пример: python benchmark.py --sizes 31 101 301 --seed 1 --output bench.csv
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import csv
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from statistics import mean
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import pygame as pg
+
+import consts as c
+from tiles_grid import Camera, SOLVER_NAMES, TileField
+
+FIELDS = ("size", "op", "best", "mean", "repeat", "peak_kb", "seed")
+
+
+def measure(func: Callable[[], None], repeat: int,
+            setup: Optional[Callable[[], None]] = None,
+            trace: bool = True) -> Dict[str, float]:
+    """
+    Функция замера операции: лучшее и среднее время по repeat запускам
+    и пиковая память отдельного запуска под tracemalloc
+    :param func: замеряемая операция
+    :param repeat: количество запусков
+    :param setup: подготовка перед каждым запуском, не входит в замер
+    :param trace: замерять пиковую память
+    :return: словарь с best, mean и peak_kb
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+
+    peak = None
+    if trace:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return {"best": min(times), "mean": mean(times), "peak_kb": peak}
+
+
+def bench_size(field: TileField, size: int, seed: int, repeat: int,
+               solvers: List[str], trace: bool, directory: str) \
+        -> List[Dict[str, float]]:
+    """
+    Функция замеров всех операций на лабиринте size x size
+    :param field: поле
+    :param size: размер лабиринта (нечетный)
+    :param seed: зерно генерации
+    :param repeat: количество запусков каждой операции
+    :param solvers: алгоритмы поиска пути
+    :param trace: замерять пиковую память
+    :param directory: папка для временных файлов
+    :return: строки результатов
+    """
+    c.COLS = c.ROWS = size
+    results = []
+
+    def record(op: str, func: Callable[[], None],
+               setup: Optional[Callable[[], None]] = None) -> None:
+        row = {"size": size, "op": op, "repeat": repeat, "seed": seed,
+               **measure(func, repeat, setup, trace)}
+        results.append(row)
+        print(f"{size:>6} {op:<16} best {row['best']:.4f} s "
+              f"mean {row['mean']:.4f} s peak {row['peak_kb']} KiB")
+
+    record("generate_maze", lambda: field.regen(seed))
+
+    route = [field[1, 1], field[size - 2, size - 2]]
+
+    def cold_cache() -> None:
+        field.reset_marks(route)
+        field.distances.invalidate()
+
+    for solver in solvers:
+        if solver == "cached":
+            # Промах кэша полей расстояний и попадание в заполненный кэш
+            record("find_way_cached_miss",
+                   lambda: field.find_way(route, "cached"), cold_cache)
+            record("find_way_cached_hit",
+                   lambda: field.find_way(route, "cached"),
+                   lambda: field.reset_marks(route))
+            continue
+        record(f"find_way_{solver}", lambda: field.find_way(route, solver),
+               lambda: field.reset_marks(route))
+    field.reset_marks(route)
+
+    paths = {kind: os.path.join(directory, f"maze{size}.{kind}")
+             for kind in ("txt", "png", "maze")}
+    record("save_to_txt", lambda: field.save_to_txt(filename=paths["txt"]))
+    record("save_to_png", lambda: field.save_to_png(paths["png"]))
+    record("save_to_bin", lambda: field.save_to_bin(paths["maze"]))
+    record("load_from_txt", lambda: field.load_from_txt(paths["txt"]))
+    record("load_from_png", lambda: field.load_from_png(paths["png"]))
+    record("load_from_bin", lambda: field.load_from_bin(paths["maze"]))
+
+    renderer = field.renderer
+    record("render_full", renderer.render, renderer.invalidate)
+    record("render_pan", renderer.render, lambda: field.camera.move(3, 2))
+    record("render_idle", renderer.render)
+    field.camera.reset()
+    return results
+
+
+def save_results(results: List[Dict[str, float]], filename: str) -> None:
+    """
+    Функция сохранения результатов, формат выбирается по расширению
+    :param results: строки результатов
+    :param filename: название файла .json или .csv
+    """
+    if filename.endswith(".csv"):
+        with open(filename, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+def main(args=None) -> None:
+    parser = ArgumentParser(description="Замеры скорости лабиринта без окна")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[31, 101, 301],
+                        help="размеры лабиринтов (нечетные)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="зерно генерации")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="количество запусков каждой операции")
+    parser.add_argument("--solvers", nargs="+",
+                        default=SOLVER_NAMES,
+                        choices=SOLVER_NAMES,
+                        help="алгоритмы поиска пути")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="не замерять пиковую память")
+    parser.add_argument("--output", default="bench_output.json",
+                        help="файл результатов .json или .csv")
+    parsed = parser.parse_args(args)
+
+    # Без ограничения кадров и пошаговой отрисовки генерации
+    c.FPS = 0
+    c.REALTIME_GEN = False
+    pg.init()
+    screen = pg.display.set_mode((c.MAZE_W, c.MAZE_H))
+    camera = Camera(screen, c.MAZE_W, c.MAZE_H)
+    c.COLS = c.ROWS = parsed.sizes[0]
+    field = TileField(screen, camera, pg.time.Clock(), seed=parsed.seed)
+
+    results = []
+    with TemporaryDirectory() as directory:
+        for size in parsed.sizes:
+            results += bench_size(field, size | 1, parsed.seed, parsed.repeat,
+                                  parsed.solvers, not parsed.no_memory,
+                                  directory)
+    save_results(results, parsed.output)
+    print(f"Результаты сохранены в {parsed.output}")
+
+
+if __name__ == '__main__':
+    main()
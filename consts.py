@@ -25,6 +25,10 @@ CELL_SIZE = 32
 
 ROWS = 31
 COLS = 31
+SEED = None  # Зерно генерации лабиринта, None - случайное
+
+CHUNK_PX = 512  # Размер куска поля, отрисовываемого заранее, в пикселях экрана
+CHUNK_CACHE_MB = 128  # Память под готовые куски поля (видимые хранятся всегда)
 
 FPS = 60
 
@@ -39,6 +43,19 @@ tileset_path = "sources"
 
 REALTIME_GEN = False
 SAVE_GIF = False
+GIF_QUEUE_SIZE = 64  # Кадров в очереди на кодирование гифки
+GIF_POLICY = "drop_newest"  # Что делать с кадрами при заполненной очереди
+GIF_SAMPLING = "interval"  # Какие кадры записывать: all, every, interval, adaptive
+GIF_SAMPLE_EVERY = 10  # Шаг записи кадров для every
+GIF_INTERVAL = 40  # Минимальный интервал между кадрами гифки в мс для interval
+
+SOLVER = "lee"
+PLAN_ROUTE = False  # Выбирать порядок обхода точек маршрута самостоятельно
+PARALLEL_SOLVE = False  # Искать отрезки маршрута одновременно в пуле процессов
+SOLVE_WORKERS = None  # Процессов в пуле, None - по числу ядер
+DISTANCE_CACHE_MB = 256  # Память под поля расстояний повторных запросов пути
+BINARIZATION = "threshold"  # Бинаризация картинок: threshold, otsu, adaptive
+PNG_CELL_SIZE = 1  # Размер клетки в пикселях при сохранении в png
 
 CONTROLS = {
     pg.K_w: {
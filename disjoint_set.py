@@ -0,0 +1,54 @@
+"""
+Файл с реализацией системы непересекающихся множеств (union-find)
+"""
+from typing import List
+
+
+class DisjointSet:
+    """
+    Система непересекающихся множеств над целыми индексами
+    со сжатием путей и объединением по рангу
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Конструктор системы множеств, изначально каждый элемент - отдельное множество
+        :param size: количество элементов (индексы от 0 до size - 1)
+        """
+        self.parent: List[int] = list(range(size))
+        self.rank: List[int] = [0] * size
+        self.unions = 0
+
+    def find(self, item: int) -> int:
+        """
+        Метод поиска представителя множества элемента со сжатием пути
+        :param item: индекс элемента
+        :return: индекс представителя множества
+        """
+        parent = self.parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, first: int, second: int) -> bool:
+        """
+        Метод объединения множеств двух элементов по рангу
+        :param first: индекс первого элемента
+        :param second: индекс второго элемента
+        :return: True если множества были объединены,
+        False если элементы уже лежали в одном множестве
+        """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        rank = self.rank
+        if rank[first] < rank[second]:
+            first, second = second, first
+        self.parent[second] = first
+        if rank[first] == rank[second]:
+            rank[first] += 1
+        self.unions += 1
+        return True
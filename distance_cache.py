@@ -0,0 +1,101 @@
+"""
+Файл с кэшем полей расстояний до клеток-назначений
+для повторных запросов пути по неизменному лабиринту
+"""
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from maze_grid import MazeGrid
+from solvers import FlatMaze, backtrack, distance_field
+
+
+class DistanceCache:
+    """
+    Класс LRU кэша полных полей расстояний, ключ - клетка-назначение
+    и версия поля, при изменении проходимости клеток поле получает
+    новую версию и кэш сбрасывается. Объем кэша ограничен в байтах:
+    одно поле занимает 4 байта на клетку с рамкой, для 4000x4000 это ~64 Мб
+    """
+
+    def __init__(self, max_mb: int = 256) -> None:
+        """
+        Конструктор кэша
+        :param max_mb: память под поля расстояний в мегабайтах,
+        последнее запрошенное поле хранится всегда
+        """
+        self.max_bytes = max_mb << 20
+        self.fields: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.fields_bytes = 0
+        self.version: Optional[int] = None
+        self.maze: Optional[FlatMaze] = None
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self) -> None:
+        """
+        Метод сброса кэша
+        """
+        self.fields.clear()
+        self.fields_bytes = 0
+        self.version = None
+        self.maze = None
+
+    def sync(self, grid: MazeGrid) -> FlatMaze:
+        """
+        Метод получения плоской копии поля, при смене версии поля
+        копия (вместе со смежностью клеток) строится заново,
+        а поля расстояний сбрасываются
+        :param grid: поле
+        :return: плоская копия поля
+        """
+        if grid.version != self.version:
+            self.invalidate()
+            self.version = grid.version
+            self.maze = FlatMaze(grid.status)
+        return self.maze
+
+    def field(self, grid: MazeGrid, dest: int) -> np.ndarray:
+        """
+        Метод получения поля расстояний до клетки, считающий его при отсутствии
+        :param grid: поле
+        :param dest: индекс клетки поля
+        :return: плоский массив расстояний плоской копии, отсчитанных от 1
+        """
+        maze = self.sync(grid)
+        key = (dest, self.version)
+        field = self.fields.get(key)
+        if field is None:
+            self.misses += 1
+            field = self.fields[key] = distance_field(maze, dest)
+            self.fields_bytes += field.nbytes
+            while self.fields_bytes > self.max_bytes and len(self.fields) > 1:
+                self.fields_bytes -= self.fields.popitem(last=False)[1].nbytes
+        else:
+            self.hits += 1
+            self.fields.move_to_end(key)
+        return field
+
+    def path(self, grid: MazeGrid, start: int, goal: int) -> List[int]:
+        """
+        Метод поиска пути спуском по полю расстояний до конечной клетки
+        :param grid: поле
+        :param start: индекс начальной клетки поля
+        :param goal: индекс конечной клетки поля
+        :return: индексы клеток поля от start до goal, пустой если пути нет
+        """
+        field = self.field(grid, goal)
+        flat_start, flat_goal = self.maze.to_flat(start), self.maze.to_flat(goal)
+        if not field[flat_start]:
+            return []
+        return backtrack(self.maze, field, flat_goal, flat_start)[::-1]
+
+    def stats(self) -> str:
+        """
+        Метод получения строки со статистикой кэша
+        :return: попадания, промахи и занятая полями память
+        """
+        return (f"Кэш расстояний: попаданий {self.hits}, "
+                f"промахов {self.misses}, полей {len(self.fields)} "
+                f"({self.fields_bytes >> 20} Мб)")
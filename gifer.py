@@ -2,9 +2,17 @@
 Файл с классом сохраняющим гифки
 """
 
+import atexit
 import os
+from queue import Empty, Full, Queue
+from threading import Thread
+from time import perf_counter
 
-from PIL import Image
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+DROP_POLICIES = ("block", "drop_newest", "drop_oldest")
+SAMPLING_MODES = ("all", "every", "interval", "adaptive")
 
 
 def mk_dir(directory):
@@ -14,71 +22,285 @@ def mk_dir(directory):
 
 class GifSaver:
     """
-    Класс, сохраняющий гифки
+    Класс, сохраняющий гифки, кадры передаются через ограниченную очередь
+    фоновому потоку, который кодирует их и дописывает в открытый файл.
+    В файл пишется только прямоугольник, изменившийся с прошлого кадра,
+    поверх предыдущего кадра, длительность кадра - реальное время
+    до следующего записанного кадра
     """
 
-    def __init__(self, directory, screen_width, screen_height) -> None:
+    def __init__(self, directory, screen_width, screen_height,
+                 min_duration=20, max_queue=64, policy="block",
+                 sampling="all", every=1, interval=40,
+                 min_change=0.001, max_hold=1000) -> None:
         """
         Конструктор сохранялки гифок
         :param directory: путь к директории с результирующей гифкой
         :param screen_width: ширина экрана
         :param screen_height: высота экрана
+        :param min_duration: минимальная длительность кадра в миллисекундах,
+        более частые изменения объединяются в один кадр
+        :param max_queue: максимальное количество кадров в очереди
+        :param policy: поведение при заполненной очереди:
+        "block" - ждать освобождения места,
+        "drop_newest" - выбросить добавляемый кадр,
+        "drop_oldest" - выбросить самый старый кадр из очереди
+        :param sampling: выбор записываемых кадров:
+        "all" - все кадры,
+        "every" - каждый every-й шаг анимации,
+        "interval" - не чаще, чем раз в interval миллисекунд,
+        "adaptive" - кадр записывается, когда изменилась доля экрана
+        не меньше min_change или прошло max_hold миллисекунд
+        :param every: шаг записи кадров для "every"
+        :param interval: интервал между кадрами в миллисекундах для "interval"
+        :param min_change: доля изменившихся пикселей для "adaptive"
+        :param max_hold: максимальное время задержки кадра для "adaptive"
         """
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Неизвестная политика очереди {policy}, "
+                             f"доступны {DROP_POLICIES}")
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"Неизвестный режим записи {sampling}, "
+                             f"доступны {SAMPLING_MODES}")
         self.gif_dir = directory
         mk_dir(self.gif_dir)
         index = len(list(filter(lambda x: x.startswith("res"), os.listdir(self.gif_dir))))
-        self.res_gif_path = self.gif_dir + f"\\res{index}.gif"
-        self.frames = []
+        self.res_gif_path = os.path.join(self.gif_dir, f"res{index}.gif")
         self.frames_count = 0
+        self.frames_added = 0
+        self.steps = 0
+        self.dropped = 0
         self.size = (screen_width, screen_height)
-        self.gif_num = 1
+        self.min_duration = min_duration
+        self.policy = policy
+        self.sampling = sampling
+        self.every = max(every, 1)
+        self.interval = interval
+        self.min_change = min_change
+        self.max_hold = max_hold
+        self.last_capture = None
+        self.screen = np.zeros((screen_height, screen_width, 3), dtype=np.uint8)
+        self.canvas = np.zeros_like(self.screen)
+        self.dirty = None
+        self.lost = None
+        self.pending = None
+        self.last_stamp = 0
+        self.file = open(self.res_gif_path, "wb")
+        self.write_header()
+        self.queue = Queue(maxsize=max_queue)
+        self.worker = Thread(target=self.encode_loop, name="gif-encoder",
+                             daemon=True)
+        self.worker.start()
+        # Поток держит ссылку на сохранялку, поэтому __del__ не вызывается
+        # до выхода, гифка дописывается при завершении программы
+        atexit.register(self.close)
 
-    def add_img(self, data) -> None:
+    def write_header(self) -> None:
         """
-        Метод добавления кадра к гифке
-        :param data: bytearray картинки
+        Метод записи заголовка гифки без глобальной палитры
+        и расширения NETSCAPE2.0 с бесконечным повтором
         """
-        img = Image.frombytes("RGBA", self.size, data)
-        self.frames_count += 1
-        self.frames.append(img)
+        width, height = self.size
+        self.file.write(b"GIF89a"
+                        + width.to_bytes(2, "little")
+                        + height.to_bytes(2, "little")
+                        + b"\x00\x00\x00")
+        self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
 
-        if self.frames_count:
-            self.save_to_gif()
+    def want_frame(self, force=False, changed=1.0) -> bool:
+        """
+        Метод проверки, нужно ли захватывать очередной шаг анимации
+        согласно режиму записи, пропущенные шаги не тратят время на захват
+        :param force: захватить кадр независимо от режима (например, последний)
+        :param changed: доля экрана, перерисованная с прошлого захвата
+        (для "adaptive")
+        :return: True если кадр нужно передать в add_img
+        """
+        if self.file is None:
+            return False
+        self.steps += 1
+        if force or not self.frames_added:
+            return True
+        if self.sampling == "every":
+            return (self.steps - 1) % self.every == 0
+        if self.sampling == "interval":
+            return (perf_counter() - self.last_capture) * 1000 >= self.interval
+        if self.sampling == "adaptive":
+            if self.lost is not None:
+                return True
+            return changed >= self.min_change or changed > 0 and \
+                (perf_counter() - self.last_capture) * 1000 >= self.max_hold
+        return True
 
-    def save_to_gif(self) -> None:
+    def add_img(self, data, region=None, force=False) -> None:
         """
-        Метод сохранения гифки в директорию
+        Метод добавления кадра к гифке, кадр с временем захвата ставится
+        в очередь кодирования согласно политике заполненной очереди.
+        Первый кадр кодируется сразу и не выбрасывается, области выброшенных
+        кадров накапливаются и должны быть захвачены заново (take_lost)
+        :param data: bytearray картинки или ее области
+        :param region: область (x, y, w, h), которую занимает data,
+        None - весь экран, пустая область - кадр не изменился
+        :param force: ждать места в очереди при любой политике
+        (например, последний кадр, после которого захватов может не быть)
         """
-        self.frames[0].save(f"{self.gif_dir}\\part_gif{self.gif_num}.gif",
-                            save_all=True,
-                            append_images=self.frames[1:],
-                            optimize=True,
-                            duration=20,
-                            loop=1)
+        if self.file is None:
+            return
+        self.frames_added += 1
+        self.last_capture = perf_counter()
+        data = (data, region, self.last_capture * 1000)
+        if self.frames_added == 1:
+            # Фоновый поток еще не получил ни одного кадра и ждет очередь
+            self.encode(*data)
+            return
+        if force or self.policy == "block":
+            self.queue.put(data)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(data)
+                return
+            except Full:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    self.lose(region)
+                    return
+            try:
+                self.lose(self.queue.get_nowait()[1])
+            except Empty:
+                pass
 
-        self.frames[0].close()
-        self.frames.clear()
-        self.frames_count = 0
-        self.gif_num += 1
+    def lose(self, region) -> None:
+        """
+        Метод запоминания области выброшенного кадра
+        :param region: область (x, y, w, h) кадра, None - весь экран
+        """
+        x, y, w, h = region or (0, 0, *self.size)
+        if not w or not h:
+            return
+        if self.lost is None:
+            self.lost = (x, y, x + w, y + h)
+        else:
+            left, top, right, bottom = self.lost
+            self.lost = (min(left, x), min(top, y),
+                         max(right, x + w), max(bottom, y + h))
 
+    def take_lost(self):
+        """
+        Метод получения области выброшенных с прошлого вызова кадров,
+        которую нужно добавить к области следующего кадра
+        :return: область (x, y, w, h) или None, если кадры не выбрасывались
+        """
+        if self.lost is None:
+            return None
+        left, top, right, bottom = self.lost
+        self.lost = None
+        return left, top, right - left, bottom - top
 
-    def __del__(self) -> None:
-        print("Сохраняем гифку...")
-        gif_paths_list = list(map(lambda y: self.gif_dir + f"\\{y}",
-                                  filter(lambda x: x.startswith("part_gif"),
-                                         os.listdir(self.gif_dir))))
-        gif_paths_list.sort(key=lambda x: int(x.split("\\")[-1][8:].split(".")[0]))
-        gif_list = list(map(lambda x: Image.open(x), gif_paths_list))
-        if not gif_list:
+    def encode_loop(self) -> None:
+        """
+        Метод фонового потока, кодирующего кадры из очереди,
+        None в очереди завершает поток с записью отложенных изменений
+        """
+        while (item := self.queue.get()) is not None:
+            self.encode(*item)
+        self.emit(self.last_stamp, hold=False)
+        self.flush(self.last_stamp + self.min_duration)
+
+    def encode(self, data, region, stamp) -> None:
+        """
+        Метод приема кадра: область копируется в последний известный экран,
+        кадр гифки формируется, когда это позволяет режим записи
+        :param data: bytearray картинки или ее области
+        :param region: область (x, y, w, h), которую занимает data
+        :param stamp: время захвата кадра в миллисекундах
+        """
+        self.last_stamp = stamp
+        x, y, w, h = region or (0, 0, *self.size)
+        if not w or not h:
+            return
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(h, w, 4)[..., :3]
+        self.screen[y:y + h, x:x + w] = pixels
+        if self.dirty is None:
+            self.dirty = (x, y, x + w, y + h)
+        else:
+            left, top, right, bottom = self.dirty
+            self.dirty = (min(left, x), min(top, y),
+                          max(right, x + w), max(bottom, y + h))
+        self.emit(stamp)
+
+    def emit(self, stamp, hold=True) -> None:
+        """
+        Метод формирования кадра гифки из накопленных изменений экрана:
+        изменившийся прямоугольник сводится к палитре из 256 цветов
+        и откладывается до следующего кадра, чтобы узнать его длительность
+        :param stamp: время кадра в миллисекундах
+        :param hold: разрешить придержать изменения согласно режиму записи
+        """
+        if self.dirty is None:
+            return
+        first = not self.frames_count and self.pending is None
+        left, top, right, bottom = self.dirty
+        if not first:
+            held = stamp - self.pending[2]
+            if hold and held < self.min_duration:
+                return
+            diff = np.any(self.screen[top:bottom, left:right]
+                          != self.canvas[top:bottom, left:right], axis=2)
+            if hold and self.sampling == "adaptive" and held < self.max_hold \
+                    and np.count_nonzero(diff) < \
+                    self.min_change * self.size[0] * self.size[1]:
+                return
+            self.dirty = None
+            rows = np.flatnonzero(diff.any(axis=1))
+            if not rows.size:
+                return
+            cols = np.flatnonzero(diff.any(axis=0))
+            top, bottom = top + rows[0], top + rows[-1] + 1
+            left, right = left + cols[0], left + cols[-1] + 1
+        self.dirty = None
+        changed = self.screen[top:bottom, left:right]
+        self.canvas[top:bottom, left:right] = changed
+        img = Image.fromarray(np.ascontiguousarray(changed), "RGB")
+        frame = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        self.flush(stamp)
+        self.pending = (frame, (int(left), int(top)), stamp)
+
+    def flush(self, stamp) -> None:
+        """
+        Метод записи отложенного кадра в файл с длительностью до времени stamp,
+        кадр не стирается (disposal 1) и остается под следующими
+        :param stamp: время следующего кадра в миллисекундах
+        """
+        if self.pending is None:
             return
-        gif_list[0].save(self.res_gif_path,
-                         save_all=True,
-                         append_images=gif_list[1:],
-                         optimize=True,
-                         duration=20,
-                         loop=0)
-        for gif in gif_list:
-            gif.close()
-        for gif in gif_paths_list:
-            os.remove(gif)
-        print(f"Гифка сохранена по адресу {self.res_gif_path}")
+        frame, offset, start = self.pending
+        duration = max(round(stamp - start), self.min_duration)
+        for chunk in GifImagePlugin.getdata(frame, offset=offset, disposal=1,
+                                            duration=duration,
+                                            include_color_table=True):
+            self.file.write(chunk)
+        self.frames_count += 1
+        self.pending = None
+
+    def close(self) -> None:
+        """
+        Метод завершения гифки, пустая гифка удаляется
+        """
+        if getattr(self, "file", None) is None:
+            return
+        atexit.unregister(self.close)
+        self.queue.put(None)
+        self.worker.join()
+        self.file.write(b";")
+        self.file.close()
+        self.file = None
+        if self.dropped:
+            print(f"Пропущено кадров: {self.dropped}")
+        if self.frames_count:
+            print(f"Гифка сохранена по адресу {self.res_gif_path}")
+        else:
+            os.remove(self.res_gif_path)
+
+    def __del__(self) -> None:
+        self.close()
@@ -1,12 +1,14 @@
 """
 Основной файл - точка входа
 """
+from argparse import ArgumentParser, ArgumentTypeError
 from typing import List
 
 import pygame as pg
 import consts as c
 from gifer import GifSaver
-from tiles_grid import TileField, Camera
+from maze_io import MAX_SEED
+from tiles_grid import TileField, Camera, SOLVER_NAMES
 from pg_menus import Menus, Events
 
 
@@ -20,10 +22,7 @@ class Window:
         self.maze_surface = self.screen.subsurface((0, 0, c.MAZE_W, c.MAZE_H))
         self.menu_surface = self.screen.subsurface(c.MENU_RECT)
         self.menu = Menus(self.menu_surface)
-        if c.SAVE_GIF:
-            self.gifer = GifSaver("images", c.MAZE_W, c.MAZE_H)
-        else:
-            self.gifer = None
+        self.gifer = self.make_gifer() if c.SAVE_GIF else None
 
         self.camera = Camera(self.maze_surface, c.MAZE_W, c.MAZE_H)
         self.clock = pg.time.Clock()
@@ -31,11 +30,25 @@ class Window:
             self.maze_surface,
             self.camera,
             self.clock,
-            self.gifer
+            self.gifer,
+            c.SEED
         )
         self.field.generate_maze()
         self.route = []
 
+    @staticmethod
+    def make_gifer() -> GifSaver:
+        """
+        Метод создания сохранялки гифок с настройками из consts
+        :return: экземпляр GifSaver
+        """
+        return GifSaver("images", c.MAZE_W, c.MAZE_H,
+                        max_queue=c.GIF_QUEUE_SIZE,
+                        policy=c.GIF_POLICY,
+                        sampling=c.GIF_SAMPLING,
+                        every=c.GIF_SAMPLE_EVERY,
+                        interval=c.GIF_INTERVAL)
+
     def pgm_events_handler(self, events: List[pg.event.Event]) -> None:
         """
         Метод передающий ивенты pygame в меню
@@ -43,6 +56,7 @@ class Window:
         """
         self.menu.main_menu.update(events)
         self.menu.main_menu.draw(self.menu_surface)
+        pg.display.update(c.MENU_RECT)
 
     def way_point_pick_handler(self, event: pg.event.Event) -> bool:
         """
@@ -68,7 +82,6 @@ class Window:
                         status = True
                     if right_mb:
                         tile.upd_texture("unchecked_way")
-                        tile.f_weight = {}
                         if tile in self.route:
                             self.route.remove(tile)
                             status = True
@@ -82,39 +95,50 @@ class Window:
         if event.type == pg.USEREVENT:
             if event.name == "regen":
                 self.camera.reset()
-                self.field.regen()
+                self.field.regen(c.SEED)
                 self.route.clear()
             elif event.name == "find_way":
                 if len(self.route) > 1:
-                    for line in self.field:
-                        for tile in line:
-                            if tile not in self.route and tile.status != "wall":
-                                tile.upd_texture("unchecked_way")
-
+                    self.field.reset_marks(self.route)
                     self.field.find_way(self.route)
             elif event.name == "load_from":
                 if event.kind == "txt":
                     self.camera.reset()
-                    self.field.load_from_txt(event.path)
+                    try:
+                        self.field.load_from_txt(event.path)
+                    except ValueError as err:
+                        print(err)
                     self.route.clear()
                 elif event.kind == "png":
                     self.camera.reset()
-                    self.field.load_from_png(event.path)
+                    try:
+                        self.field.load_from_png(event.path)
+                    except ValueError as err:
+                        print(err)
+                    self.route.clear()
+                elif event.kind == "bin":
+                    self.camera.reset()
+                    try:
+                        self.field.load_from_bin(event.path)
+                    except ValueError as err:
+                        print(err)
                     self.route.clear()
             elif event.name == "save_to":
                 if event.kind == "txt":
                     self.field.save_to_txt(filename=event.path)
                 elif event.kind == "png":
                     self.field.save_to_png(event.path)
+                elif event.kind == "bin":
+                    self.field.save_to_bin(event.path)
             elif event.name == "gif_change":
                 if c.SAVE_GIF:
                     print("Запись гифки закончена")
-                    del self.gifer
+                    self.gifer.close()
                     self.gifer = None
                     self.field.gifer = None
                 else:
                     print("Начата запись гифки")
-                    self.gifer = GifSaver("images", c.MAZE_W, c.MAZE_H)
+                    self.gifer = self.make_gifer()
                     self.field.gifer = self.gifer
                 c.SAVE_GIF = not c.SAVE_GIF
 
@@ -142,11 +166,55 @@ class Window:
             self.field.render()
             # self.screen.fill(c.YELLOW)
             if returns.get(self.way_point_pick_handler, False) is True:
-                if self.gifer:
-                    self.gifer.add_img(pg.image.tostring(self.maze_surface, "RGBA"))
+                self.field.capture_frame()
+
+
+def seed_arg(value: str) -> int:
+    """
+    Функция проверки зерна генерации из командной строки
+    :param value: строка аргумента
+    :return: зерно от 0 до maze_io.MAX_SEED
+    """
+    try:
+        seed = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"зерно должно быть целым числом: {value}")
+    if not 0 <= seed <= MAX_SEED:
+        raise ArgumentTypeError(f"зерно должно быть от 0 до {MAX_SEED}")
+    return seed
+
+
+def parse_args(args=None) -> None:
+    """
+    Функция разбора аргументов командной строки в настройки consts
+    :param args: список аргументов, None - sys.argv
+    """
+    parser = ArgumentParser(description="Генерация и решение лабиринтов")
+    parser.add_argument("--seed", type=seed_arg, default=c.SEED,
+                        help="зерно генерации лабиринта")
+    parser.add_argument("--cols", type=int, default=c.COLS,
+                        help="количество столбцов")
+    parser.add_argument("--rows", type=int, default=c.ROWS,
+                        help="количество строк")
+    parser.add_argument("--cell-size", type=int, default=c.CELL_SIZE,
+                        help="размер клетки в пикселях")
+    parser.add_argument("--solver", default=c.SOLVER,
+                        choices=SOLVER_NAMES,
+                        help="алгоритм поиска пути")
+    parser.add_argument("--realtime", action="store_true",
+                        default=c.REALTIME_GEN,
+                        help="отрисовывать генерацию по шагам")
+    parsed = parser.parse_args(args)
+    c.SEED = parsed.seed
+    c.COLS = parsed.cols
+    c.ROWS = parsed.rows
+    c.CELL_SIZE = parsed.cell_size
+    c.SOLVER = parsed.solver
+    c.REALTIME_GEN = parsed.realtime
 
 
 def main():
+    parse_args()
     window = Window()
     window.main_loop()
 
@@ -0,0 +1,114 @@
+"""
+Файл с генерацией лабиринта без привязки к pygame и отрисовке
+"""
+from random import randint
+from time import perf_counter
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from disjoint_set import DisjointSet
+from maze_grid import WALL, UNCHECKED_WAY
+
+PROGRESS_INTERVAL = 0.1
+
+Edge = Tuple[int, List[int]]
+
+
+def pred_grid(cols: int, rows: int,
+              rand: Callable[[int, int], int] = randint) \
+        -> Tuple[np.ndarray, List[Edge], int]:
+    """
+    Функция генерации поля, где у каждой клетки соседи - стены
+    :param cols: количество столбцов
+    :param rows: количество строк
+    :param rand: функция получения случайного веса стены
+    :return: кортеж из поля статусов формы (rows, cols),
+    списка ребер, отсортированного по весу стен, и количества клеток пути
+    """
+    grid = np.full((rows, cols), WALL, dtype=np.uint8)
+    grid[1:rows - 1:2, 1:cols - 1:2] = UNCHECKED_WAY
+
+    max_weight = rows * cols
+    weighted = []
+    for y in range(1, rows - 1):
+        for x in range(1, cols - 1):
+            if x % 2 == 0 or y % 2 == 0:
+                weighted.append((rand(0, max_weight), y * cols + x))
+    weighted.sort()
+
+    edges = []
+    for _, idx in weighted:
+        y, x = divmod(idx, cols)
+        if y % 2:
+            verts = [idx - 1, idx + 1] if x < cols - 2 else [idx - 1]
+        elif x % 2:
+            verts = [idx - cols, idx + cols] if y < rows - 2 else [idx - cols]
+        else:
+            continue
+        edges.append((idx, verts))
+    return grid, edges, int(np.count_nonzero(grid))
+
+
+def kruskal_steps(edges: List[Edge], size: int, ways_count: int,
+                  progress: Optional[Callable[[float], None]] = None,
+                  progress_interval: float = PROGRESS_INTERVAL) \
+        -> Iterator[Tuple[int, bool]]:
+    """
+    Генератор шагов алгоритма Краскала
+    :param edges: список ребер (индекс стены, индексы соседних клеток),
+    отсортированный по весу стен
+    :param size: количество клеток поля
+    :param ways_count: количество клеток пути
+    :param progress: функция, получающая долю выполнения от 0 до 1,
+    вызывается не чаще, чем раз в progress_interval секунд
+    :param progress_interval: минимальный интервал между вызовами progress
+    :return: пары (индекс стены, True если стена была убрана)
+    """
+    vert_sets = DisjointSet(size)
+    # Клетки, уже попавшие в какое-либо множество: стена с одной соседней
+    # клеткой убирается, только если эта клетка еще ни в одном множестве
+    touched = bytearray(size)
+    need_unions = ways_count - 1
+    last_report = perf_counter()
+    for wall_idx, verts in edges:
+        if vert_sets.unions >= need_unions:
+            break
+
+        cycle = len(verts) > 1 or touched[verts[0]]
+        for vert in verts[1:]:
+            if vert_sets.union(verts[0], vert):
+                cycle = False
+        for vert in verts:
+            touched[vert] = True
+        yield wall_idx, not cycle
+
+        if progress is not None and \
+                perf_counter() - last_report >= progress_interval:
+            progress(vert_sets.unions / need_unions)
+            last_report = perf_counter()
+
+    if progress is not None:
+        progress(1.0)
+
+
+def generate_maze(cols: int, rows: int,
+                  progress: Optional[Callable[[float], None]] = None,
+                  progress_interval: float = PROGRESS_INTERVAL,
+                  rand: Callable[[int, int], int] = randint) -> np.ndarray:
+    """
+    Функция генерации лабиринта по алгоритму Краскала без отрисовки
+    :param cols: количество столбцов
+    :param rows: количество строк
+    :param progress: функция, получающая долю выполнения от 0 до 1
+    :param progress_interval: минимальный интервал между вызовами progress
+    :param rand: функция получения случайного веса стены
+    :return: поле статусов формы (rows, cols) с кодами WALL и UNCHECKED_WAY
+    """
+    grid, edges, ways_count = pred_grid(cols, rows, rand)
+    flat = grid.reshape(-1)
+    for wall_idx, opened in kruskal_steps(edges, grid.size, ways_count,
+                                          progress, progress_interval):
+        if opened:
+            flat[wall_idx] = UNCHECKED_WAY
+    return grid
@@ -0,0 +1,160 @@
+"""
+Файл с компактным представлением поля лабиринта на массивах numpy
+"""
+from itertools import count
+from typing import Optional, Tuple
+
+import numpy as np
+
+WALL = 0
+UNCHECKED_WAY = 1
+CHECKED_WAY = 2
+WAY = 3
+
+STATUSES = ("wall", "unchecked_way", "checked_way", "way")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Общий счетчик версий, чтобы версии разных полей не совпадали
+VERSIONS = count()
+
+
+class MazeGrid:
+    """
+    Класс поля клеток, хранящий статусы и расстояния в плоских массивах
+    """
+
+    def __init__(self, cols: int, rows: int,
+                 status: Optional[np.ndarray] = None,
+                 dist: Optional[np.ndarray] = None,
+                 rng: Optional[np.random.Generator] = None) -> None:
+        """
+        Конструктор поля
+        :param cols: количество столбцов
+        :param rows: количество строк
+        :param status: массив кодов статусов формы (rows, cols),
+        если не передан - поле заполняется стенами
+        :param dist: массив расстояний формы (rows, cols),
+        используется без копирования, если не передан - заполняется нулями
+        :param rng: генератор случайных чисел для вариантов текстур,
+        если не передан - используется глобальный генератор numpy
+        """
+        self.cols = cols
+        self.rows = rows
+        if status is None:
+            status = np.full((rows, cols), WALL, dtype=np.uint8)
+        elif status.shape != (rows, cols):
+            raise ValueError(f"Размер поля {status.shape[::-1]} "
+                             f"не совпадает с {(cols, rows)}")
+        self.status = status.astype(np.uint8, copy=False)
+        if dist is None:
+            dist = np.zeros((rows, cols), dtype=np.int32)
+        elif dist.shape != (rows, cols):
+            raise ValueError(f"Размер расстояний {dist.shape[::-1]} "
+                             f"не совпадает с {(cols, rows)}")
+        self.dist = dist
+        if rng is None:
+            self.variant = np.random.randint(0, 256, (rows, cols),
+                                             dtype=np.uint8)
+        else:
+            self.variant = rng.integers(0, 256, (rows, cols), dtype=np.uint8)
+        self.changed = np.zeros(rows * cols, dtype=bool)
+        self.changed_count = 0
+        self.version = next(VERSIONS)
+
+    @classmethod
+    def from_status(cls, status: np.ndarray,
+                    dist: Optional[np.ndarray] = None,
+                    rng: Optional[np.random.Generator] = None) -> "MazeGrid":
+        """
+        Метод создания поля из двумерного массива кодов статусов
+        :param status: массив формы (rows, cols)
+        :param dist: массив расстояний формы (rows, cols)
+        :param rng: генератор случайных чисел для вариантов текстур
+        :return: поле
+        """
+        rows, cols = status.shape
+        return cls(cols, rows, status, dist, rng)
+
+    @property
+    def size(self) -> int:
+        """
+        Количество клеток поля
+        """
+        return self.cols * self.rows
+
+    @property
+    def flat(self) -> np.ndarray:
+        """
+        Плоское представление массива статусов (без копирования)
+        """
+        return self.status.reshape(-1)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        """
+        Метод проверки нахождения координат внутри поля
+        :param x: координата по оси x
+        :param y: координата по оси y
+        :return: True если клетка существует
+        """
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def index(self, x: int, y: int) -> int:
+        """
+        Метод перевода координат клетки в индекс плоского массива
+        :param x: координата по оси x
+        :param y: координата по оси y
+        :return: индекс клетки
+        """
+        return y * self.cols + x
+
+    def coords(self, idx: int) -> Tuple[int, int]:
+        """
+        Метод перевода индекса плоского массива в координаты клетки
+        :param idx: индекс клетки
+        :return: координаты (x, y)
+        """
+        y, x = divmod(idx, self.cols)
+        return x, y
+
+    def set_status(self, idx, code: int) -> None:
+        """
+        Метод изменения статуса клеток с пометкой их как измененных,
+        если меняется проходимость клеток - меняется версия поля
+        :param idx: индекс клетки плоского массива или массив индексов
+        :param code: новый код статуса
+        """
+        if np.any((self.flat[idx] == WALL) != (code == WALL)):
+            self.version = next(VERSIONS)
+        self.flat[idx] = code
+        self.changed[idx] = True
+        self.changed_count += np.size(idx)
+
+    def take_changed(self) -> np.ndarray:
+        """
+        Метод получения индексов клеток, измененных с прошлого вызова
+        :return: отсортированный массив индексов плоского массива
+        """
+        if not self.changed_count:
+            return np.empty(0, dtype=np.int64)
+        changed = np.flatnonzero(self.changed)
+        self.changed[changed] = False
+        self.changed_count = 0
+        return changed
+
+    def reset_dist(self) -> None:
+        """
+        Метод сброса расстояний всех клеток
+        """
+        self.dist.fill(0)
+
+    def __getitem__(self, item: Tuple[int, int]) -> int:
+        x, y = item
+        if not self.in_bounds(x, y):
+            raise IndexError(f"Клетка {item} вне поля")
+        return int(self.status[y, x])
+
+    def __setitem__(self, key: Tuple[int, int], value: int) -> None:
+        x, y = key
+        if not self.in_bounds(x, y):
+            raise IndexError(f"Клетка {key} вне поля")
+        self.set_status(y * self.cols + x, value)
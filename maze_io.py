@@ -0,0 +1,396 @@
+"""
+Файл с импортом и экспортом поля лабиринта без привязки к pygame
+"""
+import gzip
+import lzma
+import mmap
+import os
+import struct
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+from maze_grid import WALL, UNCHECKED_WAY
+
+BINARIZATIONS = ("threshold", "otsu", "adaptive")
+PNG_MODES = ("L", "1", "P")
+PNG_CELL_KEY = "maze_cell_size"  # Текстовый блок png с размером клетки
+
+# Бинарный формат: заголовок, битовая маска проходимых клеток (построчно,
+# младший бит первым) и, при флаге HAS_DIST, int32 плоскость расстояний,
+# выровненная по 8 байт
+BIN_MAGIC = b"MAZE"
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct("<4sHHIIQ")  # magic, версия, флаги, cols, rows, seed
+HAS_DIST = 1
+MAX_SEED = 2 ** 64 - 1  # Зерно хранится в заголовке как uint64
+
+TXT_CHUNK_SIZE = 1 << 22
+TXT_BLOCK_CELLS = 1 << 20
+
+
+def otsu_threshold(gray: np.ndarray, default: int = 127) -> int:
+    """
+    Функция выбора порога бинаризации методом Оцу
+    (максимум межклассовой дисперсии по гистограмме яркостей)
+    :param gray: массив яркостей uint8
+    :param default: порог для картинки из одного уровня яркости,
+    у которой межклассовая дисперсия не определена
+    :return: порог, пиксели ярче которого считаются светлыми
+    """
+    hist = np.bincount(gray.reshape(-1), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * np.arange(256))
+    total, total_mean = weight[-1], mean[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (total_mean * weight - mean * total) ** 2 / \
+            (weight * (total - weight))
+    if np.isnan(variance).all():
+        return default
+    return int(np.nanargmax(variance))
+
+
+def adaptive_binarize(gray: np.ndarray, block: int = 15,
+                      ratio: float = 0.15) -> np.ndarray:
+    """
+    Функция адаптивной бинаризации (Bradley-Roth): пиксель темный, если он
+    темнее среднего по окну block x block вокруг него больше чем на ratio.
+    Средние считаются по интегральному изображению
+    :param gray: массив яркостей uint8 формы (h, w)
+    :param block: размер окна (нечетный)
+    :param ratio: доля, на которую пиксель должен быть темнее среднего
+    :return: массив bool, True - светлый пиксель
+    """
+    rad = block // 2
+    padded = np.pad(gray.astype(np.int64), rad, mode="edge")
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1),
+                        dtype=np.int64)
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    height, width = gray.shape
+    size = 2 * rad + 1
+    sums = integral[size:size + height, size:size + width] \
+        - integral[:height, size:size + width] \
+        - integral[size:size + height, :width] \
+        + integral[:height, :width]
+    return gray.astype(np.int64) * (size * size) > sums * (1 - ratio)
+
+
+def binarize(gray: np.ndarray, method: str = "threshold",
+             threshold: int = 127) -> np.ndarray:
+    """
+    Функция бинаризации массива яркостей
+    :param gray: массив яркостей uint8
+    :param method: "threshold" - фиксированный порог,
+    "otsu" - порог по методу Оцу, "adaptive" - локальный порог
+    :param threshold: порог для "threshold"
+    :return: массив bool, True - светлый пиксель
+    """
+    if method == "threshold":
+        return gray > threshold
+    if method == "otsu":
+        return gray > otsu_threshold(gray, threshold)
+    if method == "adaptive":
+        return adaptive_binarize(gray)
+    raise ValueError(f"Неизвестный метод бинаризации {method}, "
+                     f"доступны {BINARIZATIONS}")
+
+
+def status_from_image(img: Image.Image, cell_size: int,
+                      method: str = "threshold") -> np.ndarray:
+    """
+    Функция перевода картинки в поле статусов: картинка уменьшается
+    до клетки на cell_size пикселей, светлые пиксели становятся путем,
+    по краю поля ставятся стены
+    :param img: картинка PIL
+    :param cell_size: размер клетки в пикселях картинки
+    :param method: метод бинаризации
+    :return: поле статусов формы (rows, cols)
+    """
+    i_w, i_h = img.size
+    img = img.resize((max(i_w // cell_size, 1), max(i_h // cell_size, 1)),
+                     resample=Image.NEAREST)
+    gray = np.asarray(img.convert("L"))
+    status = np.where(binarize(gray, method), UNCHECKED_WAY, WALL) \
+        .astype(np.uint8)
+    status[[0, -1], :] = WALL
+    status[:, [0, -1]] = WALL
+    return status
+
+
+def load_png(filename: str, cell_size: int,
+             method: str = "threshold") -> np.ndarray:
+    """
+    Функция загрузки поля статусов из картинки, размер клетки,
+    записанный в картинку функцией save_png, важнее переданного
+    :param filename: название файла картинки
+    :param cell_size: размер клетки в пикселях картинки
+    :param method: метод бинаризации
+    :return: поле статусов формы (rows, cols)
+    """
+    with Image.open(filename) as img:
+        saved = img.info.get(PNG_CELL_KEY, "")
+        if saved.isdigit() and int(saved) > 0:
+            cell_size = int(saved)
+        return status_from_image(img, cell_size, method)
+
+
+def image_from_status(status: np.ndarray, cell_size: int = 1,
+                      mode: str = "1") -> Image.Image:
+    """
+    Функция перевода поля статусов в черно-белую картинку:
+    стены черные, остальные клетки белые, клетка занимает один пиксель
+    и растягивается до cell_size пикселей средствами PIL
+    :param status: поле статусов формы (rows, cols)
+    :param cell_size: размер клетки в пикселях
+    :param mode: "L" - оттенки серого, "1" - один бит на пиксель,
+    "P" - двухцветная палитра
+    :return: картинка PIL
+    """
+    if mode not in PNG_MODES:
+        raise ValueError(f"Неизвестный режим картинки {mode}, "
+                         f"доступны {PNG_MODES}")
+    light = status != WALL
+    if mode == "P":
+        img = Image.fromarray(light.astype(np.uint8), "P")
+        img.putpalette([0, 0, 0, 255, 255, 255])
+    else:
+        img = Image.fromarray(light)
+        if mode == "L":
+            img = img.convert("L")
+    if cell_size > 1:
+        rows, cols = status.shape
+        img = img.resize((cols * cell_size, rows * cell_size),
+                         resample=Image.NEAREST)
+    return img
+
+
+def save_png(status: np.ndarray, filename: str, cell_size: int = 1,
+             mode: str = "1") -> None:
+    """
+    Функция сохранения поля статусов в картинку,
+    размер клетки записывается в текстовый блок png для загрузки
+    :param status: поле статусов формы (rows, cols)
+    :param filename: название файла
+    :param cell_size: размер клетки в пикселях
+    :param mode: режим картинки из PNG_MODES
+    """
+    info = PngImagePlugin.PngInfo()
+    info.add_text(PNG_CELL_KEY, str(cell_size))
+    with image_from_status(status, cell_size, mode) as img:
+        img.save(filename, format="PNG", pnginfo=info)
+
+
+def dist_offset(cols: int, rows: int) -> int:
+    """
+    Функция вычисления смещения плоскости расстояний в бинарном файле
+    :param cols: количество столбцов
+    :param rows: количество строк
+    :return: смещение в байтах
+    """
+    end = BIN_HEADER.size + (cols * rows + 7) // 8
+    return (end + 7) // 8 * 8
+
+
+def save_bin(status: np.ndarray, filename: str,
+             dist: Optional[np.ndarray] = None, seed: int = 0) -> None:
+    """
+    Функция сохранения поля в бинарный формат
+    :param status: поле статусов формы (rows, cols)
+    :param filename: название файла
+    :param dist: плоскость расстояний формы (rows, cols) или None
+    :param seed: зерно генерации лабиринта
+    """
+    rows, cols = status.shape
+    packed = np.packbits(status.reshape(-1) != WALL, bitorder="little")
+    with open(filename, "wb") as file:
+        file.write(BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION,
+                                   HAS_DIST if dist is not None else 0,
+                                   cols, rows, seed))
+        file.write(packed.tobytes())
+        if dist is not None:
+            file.write(bytes(dist_offset(cols, rows) - file.tell()))
+            file.write(dist.astype("<i4", copy=False).tobytes())
+
+
+def load_bin(filename: str) \
+        -> Tuple[np.ndarray, Optional[np.ndarray], int]:
+    """
+    Функция загрузки поля из бинарного формата. Файл отображается в память,
+    плоскость расстояний возвращается представлением без копирования
+    (изменения не попадают в файл)
+    :param filename: название файла
+    :return: кортеж из поля статусов формы (rows, cols),
+    плоскости расстояний или None и зерна генерации
+    """
+    with open(filename, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(buffer) < BIN_HEADER.size:
+        raise ValueError(f"Файл {filename} слишком короткий")
+    magic, version, flags, cols, rows, seed = \
+        BIN_HEADER.unpack_from(buffer)
+    if magic != BIN_MAGIC:
+        raise ValueError(f"Файл {filename} не является лабиринтом")
+    if version > BIN_VERSION:
+        raise ValueError(f"Версия формата {version} не поддерживается")
+    size = cols * rows
+    packed = np.frombuffer(buffer, dtype=np.uint8, count=(size + 7) // 8,
+                           offset=BIN_HEADER.size)
+    bits = np.unpackbits(packed, count=size, bitorder="little")
+    status = np.where(bits, UNCHECKED_WAY, WALL).astype(np.uint8) \
+        .reshape(rows, cols)
+    dist = None
+    if flags & HAS_DIST:
+        dist = np.frombuffer(buffer, dtype="<i4", count=size,
+                             offset=dist_offset(cols, rows)) \
+            .reshape(rows, cols)
+    return status, dist, seed
+
+
+def open_compressed(raw, filename: str, mode: str):
+    """
+    Функция оборачивания файла в поток сжатия по расширению имени:
+    ".gz" - gzip, ".xz" - xz, остальные файлы не сжимаются
+    :param raw: открытый бинарный файл
+    :param filename: название файла
+    :param mode: режим открытия "rb" или "wb"
+    :return: бинарный поток
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".gz":
+        return gzip.GzipFile(fileobj=raw, mode=mode, compresslevel=6)
+    if ext == ".xz":
+        return lzma.LZMAFile(raw, mode=mode)
+    return raw
+
+
+def save_txt(status: np.ndarray, filename: str,
+             wall: str = "▓▓", way: str = "░░") -> None:
+    """
+    Функция сохранения поля статусов в текстовый формат. Текст собирается
+    из кодов символов блоками строк и пишется в файл блоками,
+    при расширении ".gz" или ".xz" файл сжимается
+    :param status: поле статусов формы (rows, cols)
+    :param filename: название файла
+    :param wall: символы для обозначения стены
+    :param way: символы для обозначения пути
+    """
+    if len(wall) != len(way):
+        raise ValueError("Длина обозначения стены не может "
+                         "отличаться от длины обозначения пути")
+    rows, cols = status.shape
+    wall_codes = np.frombuffer(wall.encode("utf-32-le"), dtype=np.uint32)
+    way_codes = np.frombuffer(way.encode("utf-32-le"), dtype=np.uint32)
+    block_rows = max(TXT_BLOCK_CELLS // max(cols, 1), 1)
+    with open(filename, "wb") as raw, \
+            open_compressed(raw, filename, "wb") as file:
+        file.write(f"wall={wall}\nway={way}\n\n".encode("utf-8"))
+        for top in range(0, rows, block_rows):
+            block = status[top:top + block_rows] != WALL
+            codes = np.empty((block.shape[0], cols * len(wall) + 1),
+                             dtype=np.uint32)
+            codes[:, :-1] = np.where(block[..., None], way_codes, wall_codes) \
+                .reshape(block.shape[0], -1)
+            codes[:, -1] = ord("\n")
+            file.write(codes.tobytes().decode("utf-32-le").encode("utf-8"))
+
+
+def parse_txt_rows(lines: List[str], wall: np.ndarray, way: np.ndarray,
+                   first_line: int) -> np.ndarray:
+    """
+    Функция перевода строк текстового лабиринта в строки поля статусов
+    :param lines: строки одинаковой ширины
+    :param wall: коды символов обозначения стены
+    :param way: коды символов обозначения пути
+    :param first_line: номер первой строки в файле для сообщений об ошибках
+    :return: поле статусов формы (len(lines), cols)
+    """
+    tile_len = wall.size
+    cells = np.frombuffer("".join(lines).encode("utf-32-le"),
+                          dtype=np.uint32).reshape(-1, tile_len)
+    is_wall = cells[:, 0] == wall[0]
+    is_way = cells[:, 0] == way[0]
+    for col in range(1, tile_len):
+        is_wall &= cells[:, col] == wall[col]
+        is_way &= cells[:, col] == way[col]
+    unknown = np.flatnonzero(~(is_wall | is_way))
+    if unknown.size:
+        row, col = divmod(int(unknown[0]), cells.shape[0] // len(lines))
+        raise ValueError(f"Неизвестное обозначение клетки в строке "
+                         f"{first_line + row}, столбце {col}")
+    return np.where(is_way, UNCHECKED_WAY, WALL).astype(np.uint8) \
+        .reshape(len(lines), -1)
+
+
+def load_txt(filename: str,
+             progress: Optional[Callable[[float], None]] = None,
+             chunk_size: int = TXT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Функция загрузки поля статусов из текстового файла формата
+    "wall=..", "way=..", пустая строка и строки лабиринта.
+    Файл читается блоками по chunk_size байт, каждый блок целых строк
+    переводится в статусы одной операцией numpy,
+    файлы ".gz" и ".xz" распаковываются на лету
+    :param filename: название файла
+    :param progress: функция, получающая долю прочитанного файла,
+    вызывается после каждого блока, кроме последнего
+    :param chunk_size: размер блока чтения в байтах
+    :return: поле статусов формы (rows, cols)
+    """
+    with open(filename, "rb") as raw, \
+            open_compressed(raw, filename, "rb") as file:
+        total = os.fstat(raw.fileno()).st_size
+        wall = file.readline().decode("utf-8").rstrip("\r\n").split("=")[-1]
+        way = file.readline().decode("utf-8").rstrip("\r\n").split("=")[-1]
+        if len(wall) != len(way):
+            raise ValueError("Длина обозначения стены не может "
+                             "отличаться от длины обозначения пути")
+        if not wall or wall == way:
+            raise ValueError("Обозначения стены и пути должны быть "
+                             "непустыми и различными")
+        wall_codes = np.frombuffer(wall.encode("utf-32-le"), dtype=np.uint32)
+        way_codes = np.frombuffer(way.encode("utf-32-le"), dtype=np.uint32)
+        file.readline()
+
+        parts = []
+        width = None
+        line_no = 4
+        blank_line = None
+        tail = b""
+        while True:
+            block = file.read(chunk_size)
+            data, tail = tail + block, b""
+            if block:
+                cut = data.rfind(b"\n") + 1
+                data, tail = data[:cut], data[cut:]
+            if not data:
+                if block:
+                    continue
+                break
+
+            lines = data.decode("utf-8").splitlines()
+            rows = []
+            for offset, line in enumerate(lines):
+                if not line:
+                    blank_line = blank_line or line_no + offset
+                    continue
+                if blank_line is not None:
+                    raise ValueError(f"Пустая строка {blank_line} "
+                                     f"внутри лабиринта")
+                width = width or len(line)
+                if len(line) != width or width % len(wall):
+                    raise ValueError(f"Строка {line_no + offset} шириной "
+                                     f"{len(line)} символов, ожидалось "
+                                     f"{width}, кратное {len(wall)}")
+                rows.append(line)
+            if rows:
+                parts.append(parse_txt_rows(rows, wall_codes, way_codes,
+                                            line_no))
+            line_no += len(lines)
+
+            if progress is not None and block and raw.tell() < total:
+                progress(raw.tell() / total)
+
+    if not parts:
+        raise ValueError(f"В файле {filename} нет лабиринта")
+    return np.concatenate(parts)
@@ -0,0 +1,148 @@
+"""
+Файл с параллельным поиском путей между соседними точками маршрута
+в пуле процессов, поле передается процессам через общую память
+"""
+import atexit
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from solvers import FlatMaze, SOLVERS, solve_route
+
+# fork копирует процесс вместе с уже запущенным потоком кодирования гифки
+# и его блокировками, поэтому процессы пула запускаются без fork
+START_METHOD = "forkserver" if "forkserver" in mp.get_all_start_methods() \
+    else "spawn"
+
+worker_maze: Optional[FlatMaze] = None
+worker_block: Optional[str] = None
+
+
+def attach_maze(name: str, rows: int, cols: int) -> None:
+    """
+    Функция подключения процесса пула к опубликованному полю: распаковка
+    битовой маски проходимых клеток из общей памяти в плоскую копию поля
+    :param name: имя блока общей памяти
+    :param rows: количество строк поля
+    :param cols: количество столбцов поля
+    """
+    global worker_maze, worker_block
+    size = (rows + 2) * (cols + 2)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        packed = np.ndarray(((size + 7) // 8,), dtype=np.uint8, buffer=shm.buf)
+        passable = np.unpackbits(packed, count=size).astype(bool)
+    finally:
+        shm.close()
+    worker_maze = FlatMaze.from_passable(passable, rows, cols)
+    worker_block = name
+
+
+def solve_segment(task: Tuple[str, int, int, str, int, int]) \
+        -> Tuple[List[int], np.ndarray]:
+    """
+    Функция поиска пути между двумя точками в процессе пула,
+    поле распаковывается заново только при смене блока общей памяти
+    :param task: кортеж (имя блока общей памяти, количество строк,
+    количество столбцов, название алгоритма, начальная клетка, конечная клетка)
+    :return: кортеж из пути и битовой маски просмотренных клеток
+    """
+    name, rows, cols, solver, start, goal = task
+    if name != worker_block:
+        attach_maze(name, rows, cols)
+    result = SOLVERS[solver](worker_maze, start, goal)
+    return result.path, np.packbits(result.dist.reshape(-1) > 0)
+
+
+class SegmentPool:
+    """
+    Класс пула процессов для поиска отрезков маршрута: процессы создаются
+    при первом поиске и живут до закрытия пула, а поле публикуется
+    в общую память только при смене его версии
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """
+        Конструктор пула
+        :param workers: количество процессов, None - по числу ядер
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.block: Optional[shared_memory.SharedMemory] = None
+        self.version: Optional[int] = None
+        atexit.register(self.close)
+
+    def publish(self, maze: FlatMaze, version: int) -> str:
+        """
+        Метод публикации битовой маски проходимых клеток в общую память,
+        для той же версии поля используется уже опубликованный блок
+        :param maze: плоская копия поля
+        :param version: версия поля
+        :return: имя блока общей памяти
+        """
+        if self.block is None or version != self.version:
+            self.release()
+            packed = np.packbits(maze.passable)
+            self.block = shared_memory.SharedMemory(create=True,
+                                                    size=max(packed.size, 1))
+            np.ndarray(packed.shape, dtype=np.uint8,
+                       buffer=self.block.buf)[:] = packed
+            self.version = version
+        return self.block.name
+
+    def release(self) -> None:
+        """
+        Метод освобождения опубликованного блока общей памяти
+        """
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+            self.version = None
+
+    def solve_route(self, maze: FlatMaze, version: int,
+                    points: Sequence[int], solver: str = "wave") \
+            -> Tuple[List[List[int]], np.ndarray]:
+        """
+        Метод поиска пути через несколько точек по порядку, где отрезки
+        между соседними точками ищутся одновременно в процессах пула
+        :param maze: плоская копия поля
+        :param version: версия поля, по которой копия была построена
+        :param points: индексы клеток поля, которые нужно пройти по порядку
+        :param solver: название алгоритма из SOLVERS
+        :return: кортеж из списка путей между соседними точками
+        (без отрезков, для которых путь не найден) и маски просмотренных клеток
+        """
+        if self.workers < 2 or len(points) < 3:
+            return solve_route(maze, points, solver)
+
+        name = self.publish(maze, version)
+        tasks = [(name, maze.rows, maze.cols, solver, points[i], points[i + 1])
+                 for i in range(len(points) - 1)]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context(START_METHOD))
+        results = list(self.executor.map(solve_segment, tasks))
+
+        size = maze.rows * maze.cols
+        visited = np.zeros(size, dtype=bool)
+        ways = []
+        for path, seen in results:
+            visited |= np.unpackbits(seen, count=size).astype(bool)
+            if path:
+                ways.append(path)
+        return ways, visited.reshape(maze.rows, maze.cols)
+
+    def close(self) -> None:
+        """
+        Метод остановки процессов пула и освобождения общей памяти
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.release()
@@ -1,7 +1,9 @@
 """
 Файл, содержащий класс для парсинга текстур тайлов
+и кэш их отмасштабированных копий
 """
-from random import choice
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
 
 import pygame as pg
 
@@ -39,30 +41,53 @@ class Tiles:
             for i in range(16)
         ]
 
-    def get_random_wall(self) -> pg.Surface:
-        """
-        Метод получения случайного холста стены
-        :return:
-        """
-        return choice(self.wall_textures)
 
-    def get_random_way(self) -> pg.Surface:
+class TextureCache:
+    def __init__(self, max_levels: int = 8) -> None:
         """
-        Метод получения случайного холста пути
-        :return:
+        Кэш отмасштабированных текстур с предумноженной альфой
+        (для отрисовки с pg.BLEND_PREMULTIPLIED), сгруппированный
+        по уровням зума (размеру клетки на экране), при переполнении
+        вытесняется давно не использованный уровень
+        :param max_levels: максимальное количество хранимых уровней
         """
-        return choice(self.way_floor_textures)
+        self.max_levels = max_levels
+        self.levels: "OrderedDict[Tuple[int, int], Dict[Hashable, pg.Surface]]" \
+            = OrderedDict()
+        self.level_key = None
+        self.level = {}
 
-    def get_random_unchecked_way(self) -> pg.Surface:
+    def switch_level(self, cell_size: Tuple[int, int]) -> None:
         """
-        Метод получения случайного холста непроверенного пути
-        :return:
+        Метод переключения на уровень зума, уровень становится
+        последним использованным
+        :param cell_size: размер клетки на экране
         """
-        return choice(self.unchecked_way_textures)
+        self.level = self.levels.pop(cell_size, {})
+        self.levels[cell_size] = self.level
+        self.level_key = cell_size
+        while len(self.levels) > self.max_levels:
+            self.levels.popitem(last=False)
 
-    def get_random_checked_way(self) -> pg.Surface:
+    def scaled(self, texture_id: Hashable, texture: pg.Surface,
+               cell_size: Tuple[int, int],
+               size: Tuple[int, int]) -> pg.Surface:
         """
-        Метод получения случайного холста проверенного
-        :return:
+        Метод получения отмасштабированной текстуры,
+        масштабирование выполняется один раз на уровень зума
+        :param texture_id: идентификатор текстуры
+        :param texture: исходная текстура
+        :param cell_size: размер клетки на экране (ключ уровня зума)
+        :param size: размер, до которого нужно отмасштабировать текстуру
+        :return: отмасштабированная текстура
         """
-        return choice(self.checked_way_textures)
+        if cell_size != self.level_key:
+            self.switch_level(cell_size)
+        surface = self.level.get(texture_id)
+        if surface is None:
+            surface = pg.transform.scale(texture, size)
+            if pg.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            surface = surface.premul_alpha()
+            self.level[texture_id] = surface
+        return surface
@@ -21,6 +21,8 @@ class Events:
     save_to_png_event = pg.event.Event(pg.USEREVENT, name="save_to", kind="png")
     load_from_txt_event = pg.event.Event(pg.USEREVENT, name="load_from", kind="txt")
     save_to_txt_event = pg.event.Event(pg.USEREVENT, name="save_to", kind="txt")
+    load_from_bin_event = pg.event.Event(pg.USEREVENT, name="load_from", kind="bin")
+    save_to_bin_event = pg.event.Event(pg.USEREVENT, name="save_to", kind="bin")
     gif_toggled_event = pg.event.Event(pg.USEREVENT, name="gif_change")
 
     @staticmethod
@@ -110,6 +112,12 @@ class Menus:
                                       maxchar=3,
                                       textinput_id="maze_cell_size",
                                       valid_chars=list("0123456789"))
+        self.main_menu.add.text_input("Seed: ",
+                                      default="" if c.SEED is None
+                                      else str(c.SEED),
+                                      maxchar=10,
+                                      textinput_id="maze_seed",
+                                      valid_chars=list("0123456789"))
         self.main_menu.add.label("Realtime Generation", max_char=0)
         self.main_menu.add.toggle_switch(title="",
                                          default=c.REALTIME_GEN,
@@ -120,6 +128,27 @@ class Menus:
                                          toggleswitch_id="save_gif",
                                          onchange=self.toggle_gifer)
         self.main_menu.add.button("Regen", self.regen_handler)
+        self.main_menu.add.label("Path solver", max_char=0)
+        solvers = [("Lee", "lee"), ("Wave", "wave"), ("A*", "astar"),
+                   ("Bidir BFS", "bidir"), ("JPS", "jps"),
+                   ("Cached BFS", "cached")]
+        self.main_menu.add.selector("",
+                                    solvers,
+                                    default=[value for _, value in
+                                             solvers].index(c.SOLVER),
+                                    selector_id="solver",
+                                    onchange=self.solver_changed)
+        self.main_menu.add.label("Optimize route order", max_char=0)
+        self.main_menu.add.toggle_switch("",
+                                         default=c.PLAN_ROUTE,
+                                         toggleswitch_id="plan_route")
+        self.parallel_widgets = (
+            self.main_menu.add.label("Parallel segments", max_char=0),
+            self.main_menu.add.toggle_switch("",
+                                             default=c.PARALLEL_SOLVE,
+                                             toggleswitch_id="parallel_solve")
+        )
+        self.solver_changed(None, c.SOLVER)
         self.main_menu.add.button("Find Way", self.find_way_post)
         self.main_menu.add.button("IO options", self.open_io)
 
@@ -143,6 +172,13 @@ class Menus:
         self.io_menu.add.toggle_switch("Type", True,
                                        state_text=("Input", "Output"),
                                        toggleswitch_id="png_io_toggle")
+        binarizations = [("Threshold", "threshold"), ("Otsu", "otsu"),
+                         ("Adaptive", "adaptive")]
+        self.io_menu.add.selector("Binarization ",
+                                  binarizations,
+                                  default=[value for _, value in
+                                           binarizations].index(c.BINARIZATION),
+                                  selector_id="binarization")
         self.io_menu.add.button("Submit", self.png_submit)
         self.io_menu.add.label("TXT IO", max_char=0, font_size=30)
         self.io_menu.add.text_input("File path:",
@@ -154,6 +190,16 @@ class Menus:
                                        state_text=("Input", "Output"),
                                        toggleswitch_id="txt_io_toggle")
         self.io_menu.add.button("Submit", self.txt_submit)
+        self.io_menu.add.label("BIN IO", max_char=0, font_size=30)
+        self.io_menu.add.text_input("File path:",
+                                    default="maze_sources/maze.maze",
+                                    maxchar=0,
+                                    textinput_id="bin_io",
+                                    input_underline="_")
+        self.io_menu.add.toggle_switch("Type", True,
+                                       state_text=("Input", "Output"),
+                                       toggleswitch_id="bin_io_toggle")
+        self.io_menu.add.button("Submit", self.bin_submit)
         self.io_menu.add.button("Go back", self.to_main_handler)
 
     def regen_handler(self) -> None:
@@ -165,6 +211,7 @@ class Menus:
         c.ROWS = int(data["maze_rows"])
         c.CELL_SIZE = int(data["maze_cell_size"])
         c.REALTIME_GEN = data["realtime"]
+        c.SEED = int(data["maze_seed"]) if data["maze_seed"] else None
         pg.event.post(Events.regen_event)
 
     def toggle_gifer(self, _) -> None:
@@ -174,10 +221,27 @@ class Menus:
         """
         pg.event.post(Events.gif_toggled_event)
 
+    def solver_changed(self, _, solver: str) -> None:
+        """
+        Метод скрытия переключателя параллельного поиска для алгоритмов,
+        которые ищут путь без пула процессов
+        :param _: выбранный пункт селектора
+        :param solver: название алгоритма
+        """
+        for widget in self.parallel_widgets:
+            if solver in ("lee", "cached"):
+                widget.hide()
+            else:
+                widget.show()
+
     def find_way_post(self) -> None:
         """
-        Метод запуска нахождения пути
+        Метод запуска нахождения пути выбранным алгоритмом
         """
+        data = self.main_menu.get_input_data()
+        (_, c.SOLVER), _ = data["solver"]
+        c.PLAN_ROUTE = data["plan_route"]
+        c.PARALLEL_SOLVE = data["parallel_solve"]
         pg.event.post(Events.find_way_event)
 
     def open_io(self) -> None:
@@ -193,6 +257,7 @@ class Menus:
         data = self.io_menu.get_input_data()
         file = data["png_io"]
         toggle = data["png_io_toggle"]
+        (_, c.BINARIZATION), _ = data["binarization"]
         if toggle:
             Events.save_to_png_event.path = file
             pg.event.post(Events.save_to_png_event)
@@ -217,6 +282,22 @@ class Menus:
                 Events.load_from_txt_event.path = file
                 pg.event.post(Events.load_from_txt_event)
 
+    def bin_submit(self) -> None:
+        """
+        Метод подтверждения IO бинарного представления
+        """
+        data = self.io_menu.get_input_data()
+        file = data["bin_io"]
+        toggle = data["bin_io_toggle"]
+        if toggle:
+            Events.save_to_bin_event.path = file
+            pg.event.post(Events.save_to_bin_event)
+
+        else:
+            if os.path.exists(file):
+                Events.load_from_bin_event.path = file
+                pg.event.post(Events.load_from_bin_event)
+
     def to_main_handler(self) -> None:
         """
         Метод возвращения в начальное меню
@@ -0,0 +1,199 @@
+"""
+Файл с планировщиком маршрута через несколько точек: матрица расстояний
+между точками и выбор порядка их обхода с фиксированной начальной точкой
+"""
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from solvers import FlatMaze, backtrack, distance_field
+
+EXACT_LIMIT = 12
+
+
+class RoutePlan(NamedTuple):
+    """
+    Результат планирования маршрута
+    order - номера точек в порядке обхода (начинается с 0),
+    недостижимые из начальной точки точки в порядок не входят
+    ways - пути между соседними точками порядка
+    visited - маска формы (rows, cols) клеток, просмотренных поиском
+    length - количество шагов маршрута
+    """
+    order: List[int]
+    ways: List[List[int]]
+    visited: np.ndarray
+    length: int
+
+
+def path_cost(order: Sequence[int], matrix: np.ndarray) -> int:
+    """
+    Функция длины незамкнутого маршрута
+    :param order: номера точек в порядке обхода
+    :param matrix: матрица расстояний между точками
+    :return: длина маршрута
+    """
+    return int(sum(matrix[order[i], order[i + 1]]
+                   for i in range(len(order) - 1)))
+
+
+def held_karp(matrix: np.ndarray) -> List[int]:
+    """
+    Функция точного выбора порядка обхода динамикой по подмножествам
+    (алгоритм Хелда-Карпа) для незамкнутого маршрута из точки 0,
+    O(2^k * k^2) времени, подходит для небольшого количества точек
+    :param matrix: матрица расстояний формы (k, k)
+    :return: номера точек в порядке обхода
+    """
+    count = len(matrix)
+    full = (1 << count) - 1
+    cost = np.full((1 << count, count), np.inf)
+    parent = np.full((1 << count, count), -1, dtype=np.int64)
+    cost[1, 0] = 0
+    for mask in range(1, full, 2):
+        cur = cost[mask]
+        if not np.isfinite(cur).any():
+            continue
+        steps = cur[:, None] + matrix
+        best = steps.argmin(axis=0)
+        best_cost = steps[best, np.arange(count)]
+        for point in range(1, count):
+            bit = 1 << point
+            if mask & bit:
+                continue
+            if best_cost[point] < cost[mask | bit, point]:
+                cost[mask | bit, point] = best_cost[point]
+                parent[mask | bit, point] = best[point]
+
+    order = []
+    mask, point = full, int(cost[full].argmin())
+    while point != -1:
+        order.append(point)
+        mask, point = mask ^ (1 << point), int(parent[mask, point])
+    order.reverse()
+    return order
+
+
+def nearest_neighbour(matrix: np.ndarray) -> List[int]:
+    """
+    Функция жадного порядка обхода: каждый раз к ближайшей непосещенной точке
+    :param matrix: матрица расстояний формы (k, k)
+    :return: номера точек в порядке обхода, начиная с 0
+    """
+    left = set(range(1, len(matrix)))
+    order = [0]
+    while left:
+        point = min(left, key=lambda idx: (matrix[order[-1], idx], idx))
+        order.append(point)
+        left.remove(point)
+    return order
+
+
+def two_opt(order: List[int], matrix: np.ndarray) -> bool:
+    """
+    Функция улучшения порядка разворотами отрезков (2-opt),
+    первая точка остается на месте
+    :param order: номера точек в порядке обхода (изменяется)
+    :param matrix: матрица расстояний
+    :return: True если порядок был улучшен
+    """
+    improved = False
+    last = len(order) - 1
+    for i in range(1, last):
+        for j in range(i + 1, last + 1):
+            before, first, end = order[i - 1], order[i], order[j]
+            delta = matrix[before, end] - matrix[before, first]
+            if j < last:
+                after = order[j + 1]
+                delta += matrix[first, after] - matrix[end, after]
+            if delta < 0:
+                order[i:j + 1] = order[i:j + 1][::-1]
+                improved = True
+    return improved
+
+
+def or_opt(order: List[int], matrix: np.ndarray) -> bool:
+    """
+    Функция улучшения порядка переносом отрезков из 1-3 точек (Or-opt)
+    на другое место маршрута, первая точка остается на месте
+    :param order: номера точек в порядке обхода (изменяется)
+    :param matrix: матрица расстояний
+    :return: True если порядок был улучшен
+    """
+    improved = False
+    for seg_len in (1, 2, 3):
+        i = 1
+        while i + seg_len <= len(order):
+            segment = order[i:i + seg_len]
+            rest = order[:i] + order[i + seg_len:]
+            base = path_cost(order, matrix)
+            best_pos, best_cost = -1, base
+            for pos in range(1, len(rest) + 1):
+                if pos == i:
+                    continue
+                cost = path_cost(rest[:pos] + segment + rest[pos:], matrix)
+                if cost < best_cost:
+                    best_pos, best_cost = pos, cost
+            if best_pos != -1:
+                order[:] = rest[:best_pos] + segment + rest[best_pos:]
+                improved = True
+            i += 1
+    return improved
+
+
+def visit_order(matrix: np.ndarray, exact_limit: int = EXACT_LIMIT) -> List[int]:
+    """
+    Функция выбора порядка обхода точек из точки 0: точно для не более
+    exact_limit точек, иначе жадный порядок, улучшенный 2-opt и Or-opt
+    :param matrix: матрица расстояний формы (k, k)
+    :param exact_limit: максимальное количество точек для точного решения
+    :return: номера точек в порядке обхода
+    """
+    if len(matrix) <= 2:
+        return list(range(len(matrix)))
+    if len(matrix) <= exact_limit:
+        return held_karp(matrix)
+    order = nearest_neighbour(matrix)
+    while two_opt(order, matrix) | or_opt(order, matrix):
+        pass
+    return order
+
+
+def plan_route(maze: FlatMaze, points: Sequence[int],
+               exact_limit: int = EXACT_LIMIT,
+               field: Optional[Callable[[int], np.ndarray]] = None) \
+        -> RoutePlan:
+    """
+    Функция планирования маршрута: по одному обходу в ширину от каждой точки
+    строится матрица расстояний, по ней выбирается порядок обхода,
+    пути между точками восстанавливаются по уже посчитанным расстояниям
+    :param maze: плоская копия поля
+    :param points: индексы клеток поля, первая - начало маршрута
+    :param exact_limit: максимальное количество точек для точного решения
+    :param field: функция получения поля расстояний от клетки поля
+    (например, из DistanceCache), по умолчанию solvers.distance_field
+    :return: план маршрута
+    """
+    if field is None:
+        def field(point: int) -> np.ndarray:
+            return distance_field(maze, point)
+
+    flat_points = np.array([maze.to_flat(point) for point in points],
+                           dtype=np.int64)
+    fields = [field(points[0])]
+    reachable = [idx for idx, flat in enumerate(flat_points)
+                 if fields[0][flat]]
+    fields += [field(points[idx]) for idx in reachable[1:]]
+
+    targets = flat_points[reachable]
+    matrix = np.array([field[targets] - 1 for field in fields],
+                      dtype=np.int64)
+    local_order = visit_order(matrix, exact_limit)
+    order = [reachable[idx] for idx in local_order]
+
+    fields_of = dict(zip(reachable, fields))
+    ways = [backtrack(maze, fields_of[first], int(flat_points[first]),
+                      int(flat_points[second]))
+            for first, second in zip(order, order[1:])]
+    visited = maze.unpad(fields[0] > 0)
+    return RoutePlan(order, ways, visited, path_cost(local_order, matrix))
@@ -0,0 +1,492 @@
+"""
+Файл с алгоритмами поиска пути по плоскому представлению поля лабиринта
+"""
+from heapq import heappop, heappush
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from maze_grid import WALL
+
+
+class Adjacency(NamedTuple):
+    """
+    Смежность проходимых клеток плоской копии в сжатом формате (CSR):
+    проходимые соседи клетки idx - cells[starts[idx]:starts[idx + 1]]
+    starts - массив размера плоской копии + 1 с началами списков соседей
+    cells - индексы соседей всех клеток подряд
+    """
+    starts: np.ndarray
+    cells: np.ndarray
+
+
+def build_adjacency(passable: np.ndarray, offsets: np.ndarray) -> Adjacency:
+    """
+    Функция построения смежности проходимых клеток операциями над массивами
+    :param passable: плоская маска проходимых клеток с рамкой из стен
+    :param offsets: смещения соседей в плоской копии
+    :return: смежность в формате CSR
+    """
+    ways = np.flatnonzero(passable)
+    cand = ways[:, None] + offsets
+    linked = passable[cand]
+    counts = np.zeros(passable.size, dtype=np.int64)
+    counts[ways] = linked.sum(axis=1)
+    starts = np.zeros(passable.size + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    return Adjacency(starts, cand[linked])
+
+
+class FlatMaze:
+    """
+    Плоская копия поля, окруженная рамкой из стен,
+    благодаря которой у любой клетки есть 4 соседа по смещениям
+    """
+
+    def __init__(self, status: np.ndarray) -> None:
+        """
+        Конструктор плоской копии поля
+        :param status: массив кодов статусов формы (rows, cols)
+        """
+        rows, cols = status.shape
+        padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+        padded[1:-1, 1:-1] = status != WALL
+        self.set_passable(padded.reshape(-1), rows, cols)
+
+    @classmethod
+    def from_passable(cls, passable: np.ndarray,
+                      rows: int, cols: int) -> "FlatMaze":
+        """
+        Метод создания плоской копии из готовой маски проходимых клеток
+        :param passable: плоская маска размера (rows + 2) * (cols + 2) с рамкой
+        :param rows: количество строк поля
+        :param cols: количество столбцов поля
+        :return: плоская копия
+        """
+        maze = cls.__new__(cls)
+        maze.set_passable(passable, rows, cols)
+        return maze
+
+    def set_passable(self, passable: np.ndarray, rows: int, cols: int) -> None:
+        """
+        Метод задания маски проходимых клеток и зависящих от нее полей
+        :param passable: плоская маска размера (rows + 2) * (cols + 2) с рамкой
+        :param rows: количество строк поля
+        :param cols: количество столбцов поля
+        """
+        self.rows, self.cols = rows, cols
+        self.width = cols + 2
+        self.passable = passable
+        self.cells = passable.tobytes()
+        self.offsets = np.array([-1, 1, -self.width, self.width],
+                                dtype=np.int64)
+        self.adjacency: Optional[Adjacency] = None
+        self.adjacency_lists: Optional[Tuple[List[int], List[int]]] = None
+
+    def get_adjacency(self) -> Adjacency:
+        """
+        Метод получения смежности проходимых клеток,
+        строится при первом обращении один раз на копию поля
+        :return: смежность в формате CSR
+        """
+        if self.adjacency is None:
+            self.adjacency = build_adjacency(self.passable, self.offsets)
+        return self.adjacency
+
+    def get_adjacency_lists(self) -> Tuple[List[int], List[int]]:
+        """
+        Метод получения смежности в виде списков для циклов на Python
+        :return: кортеж списков (starts, cells) смежности в формате CSR
+        """
+        if self.adjacency_lists is None:
+            adjacency = self.get_adjacency()
+            self.adjacency_lists = (adjacency.starts.tolist(),
+                                    adjacency.cells.tolist())
+        return self.adjacency_lists
+
+    def neighbours(self, idx: int) -> List[int]:
+        """
+        Метод получения проходимых соседей клетки
+        :param idx: индекс клетки в плоской копии
+        :return: индексы соседей в плоской копии
+        """
+        starts, cells = self.get_adjacency_lists()
+        return cells[starts[idx]:starts[idx + 1]]
+
+    def to_flat(self, idx: int) -> int:
+        """
+        Метод перевода индекса клетки поля в индекс плоской копии
+        :param idx: индекс клетки в поле (y * cols + x)
+        :return: индекс клетки в плоской копии с рамкой
+        """
+        y, x = divmod(idx, self.cols)
+        return (y + 1) * self.width + x + 1
+
+    def from_flat(self, idx: int) -> int:
+        """
+        Метод перевода индекса плоской копии в индекс клетки поля
+        :param idx: индекс клетки в плоской копии с рамкой
+        :return: индекс клетки в поле (y * cols + x)
+        """
+        y, x = divmod(idx, self.width)
+        return (y - 1) * self.cols + x - 1
+
+    def manhattan(self, first: int, second: int) -> int:
+        """
+        Метод получения манхэттенского расстояния между клетками плоской копии
+        :param first: индекс первой клетки в плоской копии
+        :param second: индекс второй клетки в плоской копии
+        :return: расстояние
+        """
+        first_y, first_x = divmod(first, self.width)
+        second_y, second_x = divmod(second, self.width)
+        return abs(first_x - second_x) + abs(first_y - second_y)
+
+    def unpad(self, plane: np.ndarray) -> np.ndarray:
+        """
+        Метод обрезки рамки у плоского массива размера плоской копии
+        :param plane: плоский массив
+        :return: массив формы (rows, cols)
+        """
+        return plane.reshape(self.rows + 2, self.width)[1:-1, 1:-1].copy()
+
+
+class SolveResult(NamedTuple):
+    """
+    Результат поиска пути между двумя клетками
+    dist - массив формы (rows, cols) с расстояниями просмотренных клеток,
+    отсчитанными от 1 в точке, из которой алгоритм до них дошел,
+    непросмотренные клетки имеют расстояние 0
+    path - индексы клеток пути от начальной до конечной, пустой если пути нет
+    expanded - количество раскрытых алгоритмом клеток
+    """
+    dist: np.ndarray
+    path: List[int]
+    expanded: int
+
+
+Solver = Callable[[FlatMaze, int, int], SolveResult]
+
+
+def backtrack(maze: FlatMaze, dist: np.ndarray, start: int, goal: int) \
+        -> List[int]:
+    """
+    Функция восстановления пути по убыванию расстояний от конечной клетки
+    :param maze: плоская копия поля
+    :param dist: плоский массив расстояний от start
+    :param start: индекс начальной клетки в плоской копии
+    :param goal: индекс конечной клетки в плоской копии
+    :return: индексы клеток поля от start до goal
+    """
+    offsets = maze.offsets.tolist()
+    way = [goal]
+    cur_idx = goal
+    while cur_idx != start:
+        lower = dist[cur_idx] - 1
+        for offset in offsets:
+            if dist[cur_idx + offset] == lower:
+                cur_idx += offset
+                break
+        way.append(cur_idx)
+    way.reverse()
+    return [maze.from_flat(idx) for idx in way]
+
+
+def next_wave(maze: FlatMaze, wave: np.ndarray, free: np.ndarray,
+              owner: np.ndarray) -> np.ndarray:
+    """
+    Функция раскрытия волны: свободные соседи клеток волны без повторов,
+    найденные клетки помечаются занятыми
+    :param maze: плоская копия поля
+    :param wave: индексы клеток текущей волны в плоской копии
+    :param free: маска еще не достигнутых проходимых клеток (изменяется)
+    :param owner: рабочий массив размера плоской копии для удаления повторов
+    :return: индексы клеток следующей волны
+    """
+    cand = (wave[:, None] + maze.offsets).reshape(-1)
+    cand = cand[free[cand]]
+    order = np.arange(cand.size)
+    owner[cand] = order
+    wave = cand[owner[cand] == order]
+    free[wave] = False
+    return wave
+
+
+def distance_field(maze: FlatMaze, start: int) -> np.ndarray:
+    """
+    Функция полного обхода в ширину от клетки
+    :param maze: плоская копия поля
+    :param start: индекс начальной клетки поля
+    :return: плоский массив размера плоской копии с расстояниями,
+    отсчитанными от 1 в start, недостижимые клетки имеют расстояние 0
+    """
+    start = maze.to_flat(start)
+    size = maze.passable.size
+    dist = np.zeros(size, dtype=np.int32)
+    free = maze.passable.copy()
+    owner = np.empty(size, dtype=np.int64)
+
+    dist[start] = 1
+    free[start] = False
+    wave = np.array([start], dtype=np.int64)
+    weight = 1
+    while wave.size:
+        weight += 1
+        wave = next_wave(maze, wave, free, owner)
+        dist[wave] = weight
+    return dist
+
+
+def wave_solve(maze: FlatMaze, start: int, goal: int,
+               on_wave: Optional[Callable[[np.ndarray], None]] = None) \
+        -> SolveResult:
+    """
+    Функция поиска пути волновым алгоритмом, где каждая волна
+    раскрывается целиком операциями над массивами numpy
+    :param maze: плоская копия поля
+    :param start: индекс начальной клетки поля
+    :param goal: индекс конечной клетки поля
+    :param on_wave: функция, получающая индексы клеток поля каждой новой волны
+    :return: результат поиска
+    """
+    start, goal = maze.to_flat(start), maze.to_flat(goal)
+    size = maze.passable.size
+    dist = np.zeros(size, dtype=np.int32)
+    free = maze.passable.copy()
+    owner = np.empty(size, dtype=np.int64)
+
+    dist[start] = 1
+    free[start] = False
+    wave = np.array([start], dtype=np.int64)
+    weight = 1
+    expanded = 1
+    while wave.size and not dist[goal]:
+        weight += 1
+        wave = next_wave(maze, wave, free, owner)
+        dist[wave] = weight
+        expanded += wave.size
+        if on_wave is not None and wave.size:
+            y, x = np.divmod(wave, maze.width)
+            on_wave((y - 1) * maze.cols + x - 1)
+
+    path = backtrack(maze, dist, start, goal) if dist[goal] else []
+    return SolveResult(maze.unpad(dist), path, expanded)
+
+
+def weights_plane(maze: FlatMaze, weights: Dict[int, int]) -> np.ndarray:
+    """
+    Функция перевода словаря расстояний в массив формы (rows, cols)
+    :param maze: плоская копия поля
+    :param weights: словарь индекс клетки плоской копии - расстояние от 0
+    :return: массив расстояний, отсчитанных от 1
+    """
+    dist = np.zeros(maze.passable.size, dtype=np.int32)
+    if weights:
+        dist[np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))] = \
+            np.fromiter(weights.values(), dtype=np.int32,
+                        count=len(weights)) + 1
+    return maze.unpad(dist)
+
+
+def parents_path(maze: FlatMaze, parents: Dict[int, int], goal: int) \
+        -> List[int]:
+    """
+    Функция восстановления пути по словарю родителей,
+    промежутки между соседними точками прямые и заполняются клетками
+    :param maze: плоская копия поля
+    :param parents: словарь индекс клетки - индекс родителя (-1 у начала)
+    :param goal: индекс конечной клетки в плоской копии
+    :return: индексы клеток поля от начальной до goal
+    """
+    way = [goal]
+    cur_idx = goal
+    while (parent := parents[cur_idx]) != -1:
+        if cur_idx // maze.width == parent // maze.width:
+            step = 1 if parent > cur_idx else -1
+        else:
+            step = maze.width if parent > cur_idx else -maze.width
+        while cur_idx != parent:
+            cur_idx += step
+            way.append(cur_idx)
+    way.reverse()
+    return [maze.from_flat(idx) for idx in way]
+
+
+def astar_solve(maze: FlatMaze, start: int, goal: int) -> SolveResult:
+    """
+    Функция поиска пути алгоритмом A* с манхэттенской эвристикой
+    :param maze: плоская копия поля
+    :param start: индекс начальной клетки поля
+    :param goal: индекс конечной клетки поля
+    :return: результат поиска
+    """
+    start, goal = maze.to_flat(start), maze.to_flat(goal)
+    starts, cells = maze.get_adjacency_lists()
+    manhattan = maze.manhattan
+
+    weights = {start: 0}
+    parents = {start: -1}
+    closed = set()
+    heap = [(manhattan(start, goal), 0, start)]
+    while heap:
+        cur_idx = heappop(heap)[2]
+        if cur_idx in closed:
+            continue
+        closed.add(cur_idx)
+        if cur_idx == goal:
+            break
+        weight = weights[cur_idx] + 1
+        for n_idx in cells[starts[cur_idx]:starts[cur_idx + 1]]:
+            if weight < weights.get(n_idx, weight + 1):
+                weights[n_idx] = weight
+                parents[n_idx] = cur_idx
+                h_weight = manhattan(n_idx, goal)
+                heappush(heap, (weight + h_weight, h_weight, n_idx))
+
+    path = parents_path(maze, parents, goal) if goal in closed else []
+    return SolveResult(weights_plane(maze, weights), path, len(closed))
+
+
+def bidirectional_solve(maze: FlatMaze, start: int, goal: int) -> SolveResult:
+    """
+    Функция поиска пути двунаправленным поиском в ширину,
+    волны от начала и конца раскрываются по очереди (меньшая первой)
+    операциями над массивами numpy, пока не встретятся
+    :param maze: плоская копия поля
+    :param start: индекс начальной клетки поля
+    :param goal: индекс конечной клетки поля
+    :return: результат поиска
+    """
+    start, goal = maze.to_flat(start), maze.to_flat(goal)
+    size = maze.passable.size
+    owner = np.empty(size, dtype=np.int64)
+    dists = [np.zeros(size, dtype=np.int32), np.zeros(size, dtype=np.int32)]
+    frees = [maze.passable.copy(), maze.passable.copy()]
+    waves = [np.array([start], dtype=np.int64), np.array([goal], dtype=np.int64)]
+    weights = [1, 1]
+    for side, idx in enumerate((start, goal)):
+        dists[side][idx] = 1
+        frees[side][idx] = False
+
+    meet = start if start == goal else -1
+    while meet == -1 and waves[0].size and waves[1].size:
+        side = 0 if waves[0].size <= waves[1].size else 1
+        dist, free, other = dists[side], frees[side], dists[1 - side]
+
+        weights[side] += 1
+        wave = next_wave(maze, waves[side], free, owner)
+        dist[wave] = weights[side]
+        waves[side] = wave
+
+        met = wave[other[wave] > 0]
+        if met.size:
+            meet = int(met[np.argmin(other[met])])
+
+    reached = (dists[0] > 0) | (dists[1] > 0)
+    dist = np.where(dists[0] > 0, dists[0], dists[1])
+    path = []
+    if meet != -1:
+        path = backtrack(maze, dists[0], start, meet)
+        path += backtrack(maze, dists[1], goal, meet)[-2::-1]
+    return SolveResult(maze.unpad(dist), path, int(np.count_nonzero(reached)))
+
+
+def jps_solve(maze: FlatMaze, start: int, goal: int) -> SolveResult:
+    """
+    Функция поиска пути алгоритмом Jump Point Search для 4-связной сетки:
+    A*, раскрывающий только точки прыжка, которые находятся
+    прямыми проходами до клеток с вынужденными соседями
+    :param maze: плоская копия поля
+    :param start: индекс начальной клетки поля
+    :param goal: индекс конечной клетки поля
+    :return: результат поиска
+    """
+    start, goal = maze.to_flat(start), maze.to_flat(goal)
+    cells = maze.cells
+    width = maze.width
+    manhattan = maze.manhattan
+
+    def jump(idx: int, step: int) -> int:
+        """
+        Функция прямого прохода от клетки до ближайшей точки прыжка
+        :param idx: индекс первой клетки прохода
+        :param step: смещение направления прохода
+        :return: индекс точки прыжка, -1 если проход уперся в стену
+        """
+        side = width if step in (1, -1) else 1
+        while cells[idx]:
+            if idx == goal:
+                return idx
+            if cells[idx - side] and not cells[idx - step - side] or \
+                    cells[idx + side] and not cells[idx - step + side]:
+                return idx
+            if side == 1 and (jump(idx + 1, 1) != -1 or jump(idx - 1, -1) != -1):
+                return idx
+            idx += step
+        return -1
+
+    weights = {start: 0}
+    parents = {start: -1}
+    closed = set()
+    heap = [(manhattan(start, goal), 0, start)]
+    while heap:
+        cur_idx = heappop(heap)[2]
+        if cur_idx in closed:
+            continue
+        closed.add(cur_idx)
+        if cur_idx == goal:
+            break
+
+        weight = weights[cur_idx]
+        parent = parents[cur_idx]
+        if parent == -1:
+            steps = (1, -1, width, -width)
+        elif cur_idx // width == parent // width:
+            step = 1 if cur_idx > parent else -1
+            steps = (step, width, -width)
+        else:
+            step = width if cur_idx > parent else -width
+            steps = (step, 1, -1)
+
+        for step in steps:
+            jump_idx = jump(cur_idx + step, step)
+            if jump_idx == -1:
+                continue
+            n_weight = weight + manhattan(cur_idx, jump_idx)
+            if n_weight < weights.get(jump_idx, n_weight + 1):
+                weights[jump_idx] = n_weight
+                parents[jump_idx] = cur_idx
+                h_weight = manhattan(jump_idx, goal)
+                heappush(heap, (n_weight + h_weight, h_weight, jump_idx))
+
+    path = parents_path(maze, parents, goal) if goal in closed else []
+    return SolveResult(weights_plane(maze, weights), path, len(closed))
+
+
+SOLVERS: Dict[str, Solver] = {
+    "wave": wave_solve,
+    "astar": astar_solve,
+    "bidir": bidirectional_solve,
+    "jps": jps_solve,
+}
+
+
+def solve_route(maze: FlatMaze, points: Sequence[int], solver: str = "wave") \
+        -> Tuple[List[List[int]], np.ndarray]:
+    """
+    Функция поиска пути через несколько точек по порядку
+    :param maze: плоская копия поля
+    :param points: индексы клеток поля, которые нужно пройти по порядку
+    :param solver: название алгоритма из SOLVERS
+    :return: кортеж из списка путей между соседними точками
+    (без отрезков, для которых путь не найден) и маски просмотренных клеток
+    """
+    solve = SOLVERS[solver]
+    visited = np.zeros((maze.rows, maze.cols), dtype=bool)
+    ways = []
+    for i in range(len(points) - 1):
+        result = solve(maze, points[i], points[i + 1])
+        visited |= result.dist > 0
+        if result.path:
+            ways.append(result.path)
+    return ways, visited
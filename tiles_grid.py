@@ -2,20 +2,31 @@
 Файл с реализацией поля клеток лабиринта и камеры для его отображения
 """
 
+from array import array
+from collections import OrderedDict
 from math import ceil
-from typing import List, Union
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
 import pygame as pg
 import pygame_menu as pgm
-from random import randint, choice
-from functools import reduce
-
-from PIL import Image
+from random import Random, randrange
 
 from pg_menus import Events
-
-from parse_tiles import Tiles
+from maze_gen import kruskal_steps, pred_grid
+from maze_io import load_bin, load_png, load_txt, save_bin, save_png, \
+    save_txt
+from solvers import SOLVERS, solve_route
+from distance_cache import DistanceCache
+from route_planner import plan_route
+from parallel_solve import SegmentPool
+from maze_grid import MazeGrid, STATUSES, STATUS_CODES, WALL, UNCHECKED_WAY, \
+    CHECKED_WAY, WAY
+
+from parse_tiles import Tiles, TextureCache
 import consts as c
 
+SOLVER_NAMES = ("lee", "cached", *sorted(SOLVERS))
+
 
 class Camera:
     def __init__(self, screen: pg.Surface,
@@ -81,6 +92,22 @@ class Camera:
                 rel_pos[1] + self.y) / self.zoom
         return int(x_sc / c.CELL_SIZE), int(y_sc / c.CELL_SIZE)
 
+    def visible_range(self, cols: int, rows: int) -> Tuple[int, int, int, int]:
+        """
+        Метод получения диапазона клеток, попадающих в обзор камеры,
+        с запасом в клетку по краям на округление и строкой снизу
+        на нависающие стены
+        :param cols: количество столбцов поля
+        :param rows: количество строк поля
+        :return: кортеж (x_from, x_to, y_from, y_to), концы не включаются
+        """
+        cell = c.CELL_SIZE * self.zoom
+        x_from = min(max(int(self.x // cell) - 1, 0), cols)
+        y_from = min(max(int(self.y // cell) - 1, 0), rows)
+        x_to = min(int((self.x + self.width) // cell) + 2, cols)
+        y_to = min(int((self.y + self.height) // cell) + 3, rows)
+        return x_from, max(x_to, x_from), y_from, max(y_to, y_from)
+
     def reset(self) -> None:
         """
         Сброс к начальным значениям
@@ -91,53 +118,441 @@ class Camera:
         self.width, self.height = self.default_wh
 
 
-class TileField(List[List["TileField.Tile"]]):
+class FieldRenderer:
+    full_redraw_share = 0.25
+    chunk_rebake_share = 0.25
+    lod_cell_px = 3
+
+    def __init__(self, field: "TileField") -> None:
+        """
+        Класс отрисовки поля заранее отрисованными кусками (чанками)
+        примерно по c.CHUNK_PX x c.CHUNK_PX пикселей экрана, количество клеток
+        в чанке зависит от зума. Чанки хранятся для текущего зума
+        (не больше c.CHUNK_CACHE_MB мегабайт, кроме видимых на экране)
+        и обновляются только при изменении клеток внутри них,
+        на экране перерисовываются только области измененных клеток,
+        пока не сдвинулась камера
+        :param field: отрисовываемое поле
+        """
+        self.field = field
+        self.cam_state = None
+        self.level = None
+        self.chunk_size = 1
+        self.updated: Optional[pg.Rect] = None
+        self.chunks: "OrderedDict[Tuple[int, int], pg.Surface]" = OrderedDict()
+        self.chunks_bytes = 0
+        self.palette = np.array(
+            [pg.transform.average_color(textures[0])[:3]
+             for textures in TileField.Tile.textures_codes],
+            dtype=np.uint8
+        )
+
+    def invalidate(self) -> None:
+        """
+        Метод сброса чанков и запроса полной перерисовки при следующем кадре
+        """
+        self.cam_state = None
+        self.chunks.clear()
+        self.chunks_bytes = 0
+
+    @staticmethod
+    def surface_bytes(surface: pg.Surface) -> int:
+        """
+        Метод получения размера пикселей холста в памяти
+        :param surface: холст
+        :return: размер в байтах
+        """
+        return surface.get_pitch() * surface.get_height()
+
+    def drop_chunk(self, chunk: Tuple[int, int]) -> None:
+        """
+        Метод удаления готового чанка
+        :param chunk: координаты чанка
+        """
+        self.chunks_bytes -= self.surface_bytes(self.chunks.pop(chunk))
+
+    @property
+    def lod(self) -> bool:
+        """
+        True если клетки настолько мелкие, что чанки рисуются цветами статусов
+        """
+        return self.level[0] < self.lod_cell_px
+
+    def update_level(self) -> None:
+        """
+        Метод пересчета размеров клетки на экране и количества клеток
+        в чанке под текущий зум, при их изменении все чанки сбрасываются
+        """
+        cell = self.field.camera.apply(
+            pg.Rect(0, 0, c.CELL_SIZE, c.CELL_SIZE)
+        )
+        w_w, w_h = TileField.Tile.tiler.wall_tile_size
+        margin = int((w_h - w_w) * (cell.h / w_w))
+        if cell.w < self.lod_cell_px:
+            margin = 0
+        level = cell.w, cell.h, margin, self.field.camera.zoom, c.CELL_SIZE
+        if level != self.level:
+            self.level = level
+            self.chunk_size = max(c.CHUNK_PX // max(cell.w, 1), 1)
+            self.invalidate()
+
+    def world_px(self, cells: int) -> int:
+        """
+        Метод перевода координаты клетки в пиксели поля при текущем зуме
+        :param cells: координата клетки
+        :return: координата левого/верхнего края клетки в пикселях
+        """
+        return ceil(cells * c.CELL_SIZE * self.field.camera.zoom)
+
+    def chunk_cells(self, chunk: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """
+        Метод получения диапазона клеток чанка
+        :param chunk: координаты чанка
+        :return: кортеж (x_from, x_to, y_from, y_to), концы не включаются
+        """
+        size = self.chunk_size
+        x_from, y_from = chunk[0] * size, chunk[1] * size
+        return x_from, min(x_from + size, self.field.grid.cols), \
+            y_from, min(y_from + size, self.field.grid.rows)
+
+    def chunk_camera(self, surface: pg.Surface,
+                     chunk: Tuple[int, int]) -> Camera:
+        """
+        Метод получения камеры, отображающей клетки чанка на его холст
+        :param surface: холст чанка
+        :param chunk: координаты чанка
+        :return: камера
+        """
+        x_from, _, y_from, _ = self.chunk_cells(chunk)
+        camera = Camera(surface, *surface.get_size())
+        camera.x = self.world_px(x_from)
+        camera.y = self.world_px(y_from) - self.level[2]
+        camera.zoom = self.field.camera.zoom
+        return camera
+
+    def bake_chunk(self, chunk: Tuple[int, int]) -> pg.Surface:
+        """
+        Метод отрисовки чанка на отдельный холст, сверху холста оставлено
+        прозрачное поле под стены, нависающие над чанком выше
+        :param chunk: координаты чанка
+        :return: холст чанка
+        """
+        grid = self.field.grid
+        cell_w, cell_h, margin = self.level[:3]
+        x_from, x_to, y_from, y_to = self.chunk_cells(chunk)
+        width = self.world_px(x_to - 1) + cell_w - self.world_px(x_from)
+        height = self.world_px(y_to - 1) + cell_h - self.world_px(y_from)
+
+        if self.lod:
+            colors = self.palette[grid.status[y_from:y_to, x_from:x_to]]
+            return pg.transform.scale(
+                pg.surfarray.make_surface(colors.transpose(1, 0, 2)),
+                (width, height)
+            )
+
+        surface = pg.Surface((width, height + margin), pg.SRCALPHA)
+        surface.fill(c.BLACK, (0, margin, width, height))
+        camera = self.chunk_camera(surface, chunk)
+        draw = TileField.Tile.draw
+        rows = zip(grid.status[y_from:y_to, x_from:x_to].tolist(),
+                   grid.variant[y_from:y_to, x_from:x_to].tolist())
+        for y, (codes, variants) in enumerate(rows, y_from):
+            for x, (code, variant) in enumerate(zip(codes, variants), x_from):
+                draw(surface, camera, x, y, code, variant)
+        return surface
+
+    def patch_chunk(self, chunk: Tuple[int, int], xs: List[int],
+                    ys: List[int]) -> None:
+        """
+        Метод перерисовки измененных клеток внутри готового холста чанка,
+        область клетки вместе с нависающей над ней стеной заново собирается
+        из клетки и ее соседей по чанку в порядке полной отрисовки
+        :param chunk: координаты чанка
+        :param xs: координаты измененных клеток по оси x
+        :param ys: координаты измененных клеток по оси y
+        """
+        grid = self.field.grid
+        surface = self.chunks[chunk]
+        camera = self.chunk_camera(surface, chunk)
+        margin = self.level[2]
+        body = pg.Rect(0, margin, surface.get_width(),
+                       surface.get_height() - margin)
+        x_from, x_to, y_from, y_to = self.chunk_cells(chunk)
+        for x, y in zip(xs, ys):
+            area = camera.apply(
+                pg.Rect(x * c.CELL_SIZE, y * c.CELL_SIZE,
+                        c.CELL_SIZE, c.CELL_SIZE)
+            )
+            area.y -= margin
+            area.h += margin
+            surface.set_clip(area)
+            surface.fill((0, 0, 0, 0))
+            surface.fill(c.BLACK, area.clip(body))
+            for cell_y in range(max(y - 1, y_from), min(y + 2, y_to)):
+                for cell_x in range(max(x - 1, x_from), min(x + 2, x_to)):
+                    TileField.Tile.draw(surface, camera, cell_x, cell_y,
+                                        grid.status[cell_y, cell_x],
+                                        grid.variant[cell_y, cell_x])
+        surface.set_clip(None)
+
+    def update_chunks(self, changed: np.ndarray) -> None:
+        """
+        Метод обновления готовых чанков, в которых изменились клетки:
+        немного изменений дорисовываются, при большом количестве
+        чанк сбрасывается и будет отрисован заново при показе
+        :param changed: индексы измененных клеток
+        """
+        if not changed.size or not self.chunks:
+            return
+        grid = self.field.grid
+        size = self.chunk_size
+        chunks_in_row = -(-grid.cols // size)
+        ys, xs = np.divmod(changed, grid.cols)
+        keys = ys // size * chunks_in_row + xs // size
+        order = np.argsort(keys, kind="stable")
+        keys, xs, ys = keys[order], xs[order], ys[order]
+        uniq, starts, counts = np.unique(keys, return_index=True,
+                                         return_counts=True)
+        for key, start, count in zip(uniq.tolist(), starts.tolist(),
+                                     counts.tolist()):
+            chunk_y, chunk_x = divmod(key, chunks_in_row)
+            chunk = chunk_x, chunk_y
+            if chunk not in self.chunks:
+                continue
+            if self.lod or count > size * size * self.chunk_rebake_share:
+                self.drop_chunk(chunk)
+            else:
+                self.patch_chunk(chunk, xs[start:start + count].tolist(),
+                                 ys[start:start + count].tolist())
+
+    def get_chunk(self, chunk: Tuple[int, int]) -> pg.Surface:
+        """
+        Метод получения холста чанка, отрисовывающий его при отсутствии
+        :param chunk: координаты чанка
+        :return: холст чанка
+        """
+        surface = self.chunks.get(chunk)
+        if surface is None:
+            surface = self.chunks[chunk] = self.bake_chunk(chunk)
+            self.chunks_bytes += self.surface_bytes(surface)
+        else:
+            self.chunks.move_to_end(chunk)
+        return surface
+
+    def compose(self, area: pg.Rect, chunks_x: range, chunks_y: range) -> None:
+        """
+        Метод сборки области экрана из чанков в порядке сверху вниз
+        :param area: область экрана
+        :param chunks_x: диапазон координат чанков по оси x
+        :param chunks_y: диапазон координат чанков по оси y
+        """
+        screen = self.field.screen
+        camera = self.field.camera
+        margin = self.level[2]
+        size = self.chunk_size
+        flags = 0 if self.lod else pg.BLEND_PREMULTIPLIED
+        screen.set_clip(area)
+        screen.fill(c.BLACK)
+        for chunk_y in chunks_y:
+            pos_y = ceil(chunk_y * size * c.CELL_SIZE * camera.zoom - camera.y)
+            for chunk_x in chunks_x:
+                pos_x = ceil(chunk_x * size * c.CELL_SIZE * camera.zoom
+                             - camera.x)
+                screen.blit(self.get_chunk((chunk_x, chunk_y)),
+                            (pos_x, pos_y - margin), special_flags=flags)
+        screen.set_clip(None)
+
+    def cell_area(self, x: int, y: int) -> pg.Rect:
+        """
+        Метод получения области экрана клетки вместе с нависающей над ней стеной
+        :param x: координата клетки по оси x
+        :param y: координата клетки по оси y
+        :return: область экрана
+        """
+        area = self.field.camera.apply(
+            pg.Rect(x * c.CELL_SIZE, y * c.CELL_SIZE, c.CELL_SIZE, c.CELL_SIZE)
+        )
+        area.y -= self.level[2]
+        area.h += self.level[2]
+        return area.clip(self.field.screen.get_rect())
+
+    def render(self) -> None:
+        """
+        Метод отрисовки кадра: полностью при смене состояния камеры
+        или большом количестве изменений, иначе только областей
+        измененных клеток
+        """
+        screen = self.field.screen
+        grid = self.field.grid
+        camera = self.field.camera
+        self.update_level()
+        size = self.chunk_size
+        changed = grid.take_changed()
+        self.update_chunks(changed)
+        cam_state = camera.x, camera.y, camera.zoom, c.CELL_SIZE
+
+        x_from, x_to, y_from, y_to = camera.visible_range(grid.cols, grid.rows)
+        changed_y, changed_x = np.divmod(changed, grid.cols)
+        visible = (x_from <= changed_x) & (changed_x < x_to) & \
+                  (y_from <= changed_y) & (changed_y < y_to)
+        changed_x, changed_y = changed_x[visible], changed_y[visible]
+        visible_size = (x_to - x_from) * (y_to - y_from)
+
+        rects = []
+        if cam_state != self.cam_state or \
+                changed_x.size > visible_size * self.full_redraw_share:
+            self.cam_state = cam_state
+            rects.append(screen.get_rect())
+            self.compose(rects[0],
+                         range(x_from // size, -(-x_to // size)),
+                         range(y_from // size, -(-y_to // size)))
+        else:
+            for x, y in zip(changed_x.tolist(), changed_y.tolist()):
+                if area := self.cell_area(x, y):
+                    rects.append(area)
+                    self.compose(area,
+                                 range(max(x - 1, 0) // size,
+                                       min(x + 1, grid.cols - 1) // size + 1),
+                                 range(max(y - 1, 0) // size,
+                                       min(y + 1, grid.rows - 1) // size + 1))
+
+        visible_chunks = len(range(x_from // size, -(-x_to // size))) * \
+            len(range(y_from // size, -(-y_to // size)))
+        # Последние использованные чанки видимы, старые вытесняются по памяти
+        cache_bytes = c.CHUNK_CACHE_MB << 20
+        while len(self.chunks) > visible_chunks and \
+                self.chunks_bytes > cache_bytes:
+            self.drop_chunk(next(iter(self.chunks)))
+
+        if rects:
+            off_x, off_y = screen.get_abs_offset()
+            pg.display.update([rect.move(off_x, off_y) for rect in rects])
+            updated = rects[0].unionall(rects[1:])
+            self.updated = updated if self.updated is None \
+                else self.updated.union(updated)
+
+    def take_updated(self) -> pg.Rect:
+        """
+        Метод получения области экрана, перерисованной с прошлого вызова
+        :return: ограничивающий прямоугольник, пустой если ничего не менялось
+        """
+        updated = self.updated or pg.Rect(0, 0, 0, 0)
+        self.updated = None
+        return updated
+
+
+class TileField:
     class Tile:
         tiler = Tiles()
         textures_status = {
-            "wall": tiler.get_random_wall,
-            "way": tiler.get_random_way,
-            "checked_way": tiler.get_random_checked_way,
-            "unchecked_way": tiler.get_random_unchecked_way
+            "wall": tiler.wall_textures,
+            "way": tiler.way_floor_textures,
+            "checked_way": tiler.checked_way_textures,
+            "unchecked_way": tiler.unchecked_way_textures
         }
+        textures_codes = tuple(map(textures_status.get, STATUSES))
+        texture_cache = TextureCache()
+
+        __slots__ = ("field", "x", "y")
 
-        def __init__(self, x, y, status="unchecked_way", weight=None) -> None:
+        def __init__(self, field: "TileField", x: int, y: int) -> None:
             """
-            Класс клетки обладающей своей текстурой,
-            зависящей от статуса и координатами
+            Класс-представление клетки, создаваемый лениво при обращении к полю,
+            статус и текстура клетки хранятся в массивах MazeGrid
+            :param field: поле, которому принадлежит клетка
             :param x: координато по оси x
             :param y: координато по оси y
-            :param status: статус клетки
-            :param weight: для генерации стен
             """
+            self.field = field
             self.x = x
             self.y = y
-            self.status = status
-            self.texture = TileField.Tile.textures_status[self.status]()
-            self.weight = weight
-            self.f_weight = {}
-            self.neighbours = []
 
-        def render(self, surface, cam) -> None:
+        @property
+        def status(self) -> str:
             """
-            Метод отрисовки клетки на холст
+            Статус клетки
+            """
+            return STATUSES[self.field.grid.status[self.y, self.x]]
+
+        @status.setter
+        def status(self, new_status: str) -> None:
+            self.field.grid[self.x, self.y] = STATUS_CODES[new_status]
+
+        @property
+        def texture(self) -> pg.Surface:
+            """
+            Текстура клетки, зависящая от статуса
+            """
+            grid = self.field.grid
+            return TileField.Tile.texture_of(grid.status[self.y, self.x],
+                                             grid.variant[self.y, self.x])
+
+        @property
+        def dist(self) -> int:
+            """
+            Расстояние, записанное в клетку последним поиском пути
+            """
+            return int(self.field.grid.dist[self.y, self.x])
+
+        @property
+        def neighbours(self) -> List["TileField.Tile"]:
+            """
+            Соседи клетки, не являющиеся стенами
+            """
+            return self.field.get_not_wall_neighbours(self)
+
+        @staticmethod
+        def texture_of(code: int, variant: int) -> pg.Surface:
+            """
+            Метод получения текстуры по коду статуса и варианту текстуры
+            :param code: код статуса клетки
+            :param variant: вариант текстуры клетки
+            :return: холст текстуры
+            """
+            textures = TileField.Tile.textures_codes[code]
+            return textures[variant % len(textures)]
+
+        @staticmethod
+        def draw(surface, cam, x, y, code, variant) -> None:
+            """
+            Метод отрисовки клетки с заданными координатами на холст
+            текстурой с предумноженной альфой, отмасштабированной
+            под текущий зум из кэша
             :param surface: холст, куда отрисовываем
             :param cam: камера, для корректного отображения
+            :param x: координата клетки по оси x
+            :param y: координата клетки по оси y
+            :param code: код статуса клетки
+            :param variant: вариант текстуры клетки
             """
-            rect = pg.Rect(self.x * c.CELL_SIZE, self.y * c.CELL_SIZE, c.CELL_SIZE,
+            rect = pg.Rect(x * c.CELL_SIZE, y * c.CELL_SIZE, c.CELL_SIZE,
                            c.CELL_SIZE)
             rect = cam.apply(rect)
-            if pg.Rect(0, 0, c.MAZE_W, c.MAZE_H).colliderect(rect):
-                if self.status == "wall":
-                    w_w, w_h = TileField.Tile.tiler.wall_tile_size
-                    rect.y -= int((w_h - w_w) * (rect.h / w_w))
-                    transformed = pg.transform.scale(self.texture,
-                                                     (rect.w,
-                                                      int(w_h * rect.h / w_w)))
-                else:
-                    transformed = pg.transform.scale(self.texture, rect[2:])
+            textures = TileField.Tile.textures_codes[code]
+            texture_idx = variant % len(textures)
+            if code == WALL:
+                w_w, w_h = TileField.Tile.tiler.wall_tile_size
+                rect.y -= int((w_h - w_w) * (rect.h / w_w))
+                size = rect.w, int(w_h * rect.h / w_w)
+            else:
+                size = rect.size
+            transformed = TileField.Tile.texture_cache.scaled(
+                (code, texture_idx), textures[texture_idx], rect.size, size
+            )
+
+            surface.blit(transformed, rect,
+                         special_flags=pg.BLEND_PREMULTIPLIED)
 
-                surface.blit(transformed, rect)
+        def render(self, surface, cam) -> None:
+            """
+            Метод отрисовки клетки на холст
+            :param surface: холст, куда отрисовываем
+            :param cam: камера, для корректного отображения
+            """
+            grid = self.field.grid
+            TileField.Tile.draw(surface, cam, self.x, self.y,
+                                grid.status[self.y, self.x],
+                                grid.variant[self.y, self.x])
 
         def upd_texture(self, new_status) -> None:
             """
@@ -145,7 +560,6 @@ class TileField(List[List["TileField.Tile"]]):
             :param new_status: новый статус
             """
             self.status = new_status
-            self.texture = TileField.Tile.textures_status[self.status]()
 
         def __hash__(self) -> int:
             return hash((self.x, self.y))
@@ -156,77 +570,113 @@ class TileField(List[List["TileField.Tile"]]):
             return False
 
         def __repr__(self) -> str:
-            if self.status == "wall" and self.weight is None:
-                status = "border_wall"
-            elif self.status == "wall" and self.weight is not None:
-                status = "maze_wall"
-            else:
-                status = self.status
+            status = self.status
+            if status == "wall":
+                grid = self.field.grid
+                if self.x in (0, grid.cols - 1) or self.y in (0, grid.rows - 1):
+                    status = "border_wall"
+                else:
+                    status = "maze_wall"
 
-            return f"Tile(({self.x}, {self.y}), {status}" \
-                   f"{f', {self.weight}' if self.weight is not None else ''})"
+            return f"Tile(({self.x}, {self.y}), {status})"
 
-    def __init__(self, screen, camera, clock, gifer=None) -> None:
+    def __init__(self, screen, camera, clock, gifer=None, seed=None) -> None:
         """
-        Класс поля для клеток, наследованный от двумерного списка
+        Класс поля для клеток, хранящий их в компактном MazeGrid
+        и создающий представления клеток только при обращении к ним
         :param screen: холст, для отрисовки поля
         :param camera: камера
         :param clock: pygame clock для поддержания fps
         :param gifer: экземпляр GifSaver для записи гифки
-        """
-        super().__init__()
-        self.walls = []
-        self.ways = []
+        :param seed: зерно генерации, None - случайное
+        """
+        self.reseed(seed)
+        self.grid = MazeGrid(c.COLS, c.ROWS)
+        self.renderer = FieldRenderer(self)
+        self.distances = DistanceCache(c.DISTANCE_CACHE_MB)
+        self.segment_pool: Optional[SegmentPool] = None
+        self.edges = []
+        self.ways_count = 0
+        self.tiles = {}
         self.screen = screen
         self.camera = camera
         self.clock = clock
         self.gifer = gifer
         self.pred_gen()
 
-    def __getitem__(self, item):
-        if isinstance(item, tuple):
-            x, y = item
-            return super().__getitem__(y).__getitem__(x)
-        else:
-            return super().__getitem__(item)
+    def __getitem__(self, item) -> "TileField.Tile":
+        x, y = item
+        if not self.grid.in_bounds(x, y):
+            raise IndexError(f"Клетка {item} вне поля")
+        tile = self.tiles.get(item)
+        if tile is None:
+            tile = self.tiles[item] = TileField.Tile(self, x, y)
+        return tile
 
-    def __setitem__(self, key, value):
-        if isinstance(key, tuple):
-            x, y = key
-            super().__getitem__(y).__setitem__(x, value)
-        else:
-            super().__setitem__(key, value)
+    def set_grid(self, grid: MazeGrid) -> None:
+        """
+        Метод замены поля клеток
+        :param grid: новое поле
+        """
+        self.grid = grid
+        self.tiles.clear()
+        self.renderer.invalidate()
+        self.distances.invalidate()
+        c.COLS = grid.cols
+        c.ROWS = grid.rows
 
     def render(self) -> None:
         """
         Метод отрисовки поля на холст
         """
-        self.screen.fill(c.BLACK)
-        for line in self:
-            for tile in line:
-                tile.render(self.screen, self.camera)
-        pg.display.flip()
-        self.clock.tick(30)
+        self.renderer.render()
+        self.clock.tick(c.FPS)
+
+    def capture_frame(self, full: bool = False, force: bool = False) -> None:
+        """
+        Метод записи кадра гифки, захватывается только область холста,
+        перерисованная с прошлого захвата, вместе с областью кадров,
+        выброшенных из заполненной очереди, если кадр нужен режиму записи
+        :param full: захватить весь холст (например, поверх поля нарисовано меню)
+        :param force: захватить кадр при любом режиме записи (последний кадр)
+        """
+        if not self.gifer:
+            return
+        updated = self.renderer.updated
+        width, height = self.screen.get_size()
+        changed = updated.w * updated.h / (width * height) if updated else 0.0
+        if not self.gifer.want_frame(force, changed):
+            return
+        region = self.renderer.take_updated()
+        if lost := self.gifer.take_lost():
+            region = region.union(lost) if region else pg.Rect(lost)
+        region = region.clip(self.screen.get_rect())
+        if full or not self.gifer.frames_added:
+            region = self.screen.get_rect()
+        data = pg.image.tostring(self.screen.subsurface(region), "RGBA") \
+            if region else b""
+        self.gifer.add_img(data, tuple(region), force)
+
+    def reseed(self, seed: Optional[int] = None) -> None:
+        """
+        Метод задания зерна генерации, от которого зависят веса стен,
+        варианты текстур и выбор клеток пути при равных расстояниях
+        :param seed: зерно от 0 до maze_io.MAX_SEED, None - случайное
+        """
+        if seed is None:
+            seed = randrange(2 ** 32)
+        self.seed = seed
+        self.rng = Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        print(f"Зерно генерации: {seed}")
 
     def pred_gen(self) -> None:
         """
         Метод генерации поля, где у каждой клетки соседи - стены
         """
-        max_weight = c.ROWS * c.COLS
-        for y in range(c.ROWS):
-            line = []
-            for x in range(c.COLS):
-                if x == 0 or x == c.COLS - 1 or y == 0 or y == c.ROWS - 1:
-                    new_tile = TileField.Tile(x, y, status="wall")
-                elif x % 2 == 0 or y % 2 == 0:
-                    new_tile = TileField.Tile(x, y, status="wall",
-                                              weight=randint(0, max_weight))
-                    self.walls.append(new_tile)
-                else:
-                    new_tile = TileField.Tile(x, y)
-                    self.ways.append(new_tile)
-                line.append(new_tile)
-            self.append(line)
+        status, self.edges, self.ways_count = pred_grid(c.COLS, c.ROWS,
+                                                        self.rng.randint)
+        self.set_grid(MazeGrid(c.COLS, c.ROWS, status, rng=self.np_rng))
 
     def get_not_wall_neighbours(self, tile: "TileField.Tile") -> \
             List["TileField.Tile"]:
@@ -235,81 +685,63 @@ class TileField(List[List["TileField.Tile"]]):
         :param tile: клетка
         :return: список клеток
         """
-        neighbours = [
-            self[tile.x - 1, tile.y],
-            self[tile.x + 1, tile.y],
-            self[tile.x, tile.y - 1],
-            self[tile.x, tile.y + 1]
+        maze = self.distances.sync(self.grid)
+        idx = maze.to_flat(self.grid.index(tile.x, tile.y))
+        return [self[self.grid.coords(maze.from_flat(n_idx))]
+                for n_idx in maze.neighbours(idx)]
 
-        ]
-        return [tile for tile in neighbours if tile.status != "wall"]
+    def reset_marks(self, keep: List["TileField.Tile"] = ()) -> None:
+        """
+        Метод сброса отметок поиска пути со всех клеток, кроме стен
+        :param keep: клетки, статус которых нужно сохранить
+        """
+        flat = self.grid.flat
+        reset = (flat != WALL) & (flat != UNCHECKED_WAY)
+        reset[[self.grid.index(tile.x, tile.y) for tile in keep]] = False
+        self.grid.set_status(np.flatnonzero(reset), UNCHECKED_WAY)
+        self.grid.reset_dist()
 
-    def generate_maze(self) -> None:
+    def progress_screen(self, title: str) -> Callable[[float], None]:
         """
-        Метод генерации лабиринта по алгоритму Краскала
+        Метод создания экрана прогресса долгой операции
+        :param title: заголовок экрана
+        :return: функция отрисовки прогресса, получающая долю от 0 до 1
         """
-        def unite_sets(s_list) -> List[set]:
+        menu = pgm.Menu(title,
+                        width=self.screen.get_width(),
+                        height=self.screen.get_height(),
+                        theme=pgm.themes.THEME_DARK,
+                        menu_id="progress_bar",
+                        position=(0, 0))
+        prog_bar = menu.add.progress_bar("", default=0,
+                                         width=int(
+                                             self.screen.get_width() * 0.8))
+
+        def show_progress(fraction: float) -> None:
             """
-            Функция объединения пересекающихся множеств в списке
-            :param s_list: список с множествами
-            :return: список без пересекающихся множеств
+            Функция отрисовки прогресса
+            :param fraction: доля выполнения от 0 до 1
             """
-            done = False
-            while not done:
-                done = True
-                for i in range(len(s_list)):
-                    for j in range(i + 1, len(s_list)):
-                        if s_list[i].intersection(s_list[j]):
-                            s_list[i].update(s_list[j])
-                            s_list.pop(j)
-                            done = False
-                            break
-                    if not done:
-                        break
-            return s_list
-
-        if not c.REALTIME_GEN:
-            menu = pgm.Menu("Generating...",
-                            width=self.screen.get_width(),
-                            height=self.screen.get_height(),
-                            theme=pgm.themes.THEME_DARK,
-                            menu_id="gen_bar",
-                            position=(0, 0))
-            prog_bar = menu.add.progress_bar("", default=0,
-                                             width=int(
-                                                 self.screen.get_width() * 0.8))
-
-        ways = set(self.ways)
-
-        edges = []
-        for wall in self.walls:
-            verts = set(self.get_not_wall_neighbours(wall))
-            if verts:
-                edges.append((verts, wall))
-        edges.sort(key=lambda x: x[1].weight)
-
-        vert_sets: List[set] = []
-        idx = 0
-        while True:
-
-            edge = edges[idx]
-            cycle = False
-            for v_set in vert_sets:
-                if edge[0].intersection(v_set):
-                    if edge[0].issubset(v_set):
-                        cycle = True
-                    else:
-                        v_set.update(edge[0])
-                    break
-            else:
-                vert_sets.append(edge[0])
-            if not cycle:
-                edge[1].upd_texture("unchecked_way")
-                edge[1].weight = None
-            unite_sets(vert_sets)
-
-            if self.gifer:
-                self.gifer.add_img(pg.image.tostring(self.screen, "RGBA"))
+            prog_bar.set_value(round(fraction * 100, 2))
+            events = pg.event.get()
+            menu.update(events)
+            menu.draw(self.screen)
+            pg.display.flip()
+            self.capture_frame(full=True)
+
+        return show_progress
+
+    def generate_maze(self) -> None:
+        """
+        Метод генерации лабиринта по алгоритму Краскала
+        """
+        steps = kruskal_steps(self.edges, self.grid.size, self.ways_count,
+                              None if c.REALTIME_GEN
+                              else self.progress_screen("Generating..."))
+        for wall_idx, opened in steps:
+            if opened:
+                self.grid.set_status(wall_idx, UNCHECKED_WAY)
+
             if c.REALTIME_GEN:
                 Events.pygame_events_handler(
                     {
@@ -318,61 +750,62 @@ class TileField(List[List["TileField.Tile"]]):
                     }
                 )
                 self.render()
-            else:
-                percentage = round(
-                    len(reduce(
-                        lambda x, y: x.union(y),
-                        vert_sets
-                    )) / len(ways) * 100, 2
-                )
-                prog_bar.set_value(percentage)
-                events = pg.event.get()
-                menu.update(events)
-                menu.draw(self.screen)
-                pg.display.flip()
-
-            idx += 1
-            if vert_sets[0] == ways:
-                break
+                self.capture_frame()
+        if c.REALTIME_GEN:
+            self.capture_frame(force=True)
+        self.edges = []
+        self.renderer.invalidate()
 
-    def find_way(self, routes) -> None:
+    def find_way(self, routes, solver=None, plan=None) -> None:
         """
         Метод поиска пути в лабиринте используя
-        алгоритм Ли (Волновой алгоритм)
+        алгоритм Ли (Волновой алгоритм) с анимацией каждой волны
+        или один из алгоритмов solvers.SOLVERS без анимации
+        (при c.PARALLEL_SOLVE отрезки маршрута ищутся в пуле процессов,
+        на алгоритм Ли и спуск по кэшированным полям это не влияет)
         :param routes: список точек, в который нужно прийти по порядку
+        :param solver: "lee", "cached" (спуск по кэшированным полям расстояний)
+        или название алгоритма из solvers.SOLVERS, по умолчанию c.SOLVER
+        :param plan: выбрать порядок обхода точек после первой
+        планировщиком route_planner, по умолчанию c.PLAN_ROUTE
         """
-        def mark_tiles(from_tile: TileField.Tile, to_tile: TileField.Tile) -> bool:
+        status = self.grid.flat
+
+        def mark_tiles(from_idx: int, to_idx: int) -> array:
             """
-            Функция отметки клеток, который просмотрены алгоритмом
-            :param from_tile: начальная клетка пути
-            :param to_tile: конечная клетка пути
-            :return: True при наличии пути, False в обратном случае
+            Функция отметки клеток, который просмотрены алгоритмом,
+            каждая клетка запоминает клетку волны, из которой до нее дошли.
+            Из нескольких равноудаленных родителей выбирается первый по обходу
+            волны, который начинается со случайной клетки генератора поля
+            :param from_idx: индекс начальной клетки пути в плоской копии
+            :param to_idx: индекс конечной клетки пути в плоской копии
+            :return: массив int32 родителей клеток по плоской копии
+            (-1 у начальной и непросмотренных), пустой массив при отсутствии пути
             """
-            from_tile.f_weight[to_tile] = 1
-            weighted = {1: [from_tile]}
-
-            while isinstance(to_tile.f_weight.get(to_tile, False), bool):
-                cur_weight = max(weighted.keys())
-                cur_wave = weighted[cur_weight]
-
-                weighted[cur_weight + 1] = []
-                appends = 0
-                for cur_tile in cur_wave:
-                    for n_tile in cur_tile.neighbours:
-
-                        if n_tile.f_weight.get(to_tile, False):
+            dist = array("i", bytes(4 * maze.passable.size))
+            parents = array("i", [-1]) * maze.passable.size
+            dist[from_idx] = 1
+            cur_wave = [from_idx]
+            cur_weight = 1
+
+            while not dist[to_idx]:
+                next_wave = []
+                shift = self.rng.randrange(len(cur_wave))
+                for cur_idx in cur_wave[shift:] + cur_wave[:shift]:
+                    for n_idx in cells[starts[cur_idx]:starts[cur_idx + 1]]:
+                        if dist[n_idx]:
                             continue
-
-                        n_tile.f_weight[to_tile] = cur_weight + 1
-
-                        if n_tile.status != "way":
-                            n_tile.upd_texture("checked_way")
-
-                        weighted[cur_weight + 1].append(n_tile)
-                        appends += 1
-                if appends == 0:
+                        dist[n_idx] = cur_weight + 1
+                        parents[n_idx] = cur_idx
+                        next_wave.append(n_idx)
+                if not next_wave:
                     print("NO WAY")
-                    return False
+                    return array("i")
+
+                wave = maze.from_flat(np.array(next_wave))
+                self.grid.set_status(wave[status[wave] != WAY], CHECKED_WAY)
+                cur_wave = next_wave
+                cur_weight += 1
 
                 Events.pygame_events_handler(
                     {
@@ -383,61 +816,33 @@ class TileField(List[List["TileField.Tile"]]):
 
                 self.render()
 
-                if self.gifer:
-                    self.gifer.add_img(pg.image.tostring(self.screen, "RGBA"))
-            return True
+                self.capture_frame()
+            self.grid.dist[:] = maze.unpad(np.frombuffer(dist, dtype=np.int32))
+            return parents
 
-        def find_way_in_marked(from_tile: TileField.Tile, to_tile: TileField.Tile) \
-            -> List[TileField.Tile]:
+        def find_way_in_marked(to_idx: int, parents: array) -> List[int]:
             """
-            Функция поиска пути в пространстве отмеченных клеток
-            :param from_tile: начальная клетка
-            :param to_tile: конечная клетка
-            :return: список клеток, входящих в путь
+            Функция восстановления пути по родителям отмеченных клеток
+            :param to_idx: индекс конечной клетки в плоской копии
+            :param parents: массив родителей клеток по плоской копии
+            :return: список индексов клеток поля, входящих в путь
             """
-            way = [to_tile]
-            cur_tile = to_tile
-            while cur_tile != from_tile:
-                neighbours = self.get_not_wall_neighbours(cur_tile)
-                cur_marked = list(
-                    filter(lambda c_tile: c_tile.f_weight.get(to_tile, False),
-                           neighbours))
-
-                lowest = \
-                    min(cur_marked,
-                        key=lambda c_tile: c_tile.f_weight[to_tile]).f_weight[
-                        to_tile]
-                lowest_list = [c_tile for c_tile in cur_marked if
-                               c_tile.f_weight[to_tile] == lowest]
-                try:
-                    res_tile = choice(lowest_list)
-                except Exception:
-                    break
-
-                way.append(res_tile)
-                cur_tile = res_tile
-
-                Events.pygame_events_handler(
-                    {
-                        "handler": Events.move_event_handler,
-                        "args": [self.camera]
-                    }
-                )
+            way = [to_idx]
+            while (parent := parents[way[-1]]) != -1:
+                way.append(parent)
 
             way.reverse()
-            return way
+            return [maze.from_flat(idx) for idx in way]
 
-        def render_ways(ways: List[List[TileField.Tile]]) -> None:
+        def render_ways(ways: List[List[int]]) -> None:
             """
             Функция отрисовки клеток путей на холст
-            :param ways:
+            :param ways: списки индексов клеток путей
             """
             for way in ways:
-                if way is None:
-                    continue
-                for tile in way:
+                for idx in way:
 
-                    tile.upd_texture("way")
+                    self.grid.set_status(idx, WAY)
 
                     Events.pygame_events_handler(
                         {
@@ -447,138 +852,134 @@ class TileField(List[List["TileField.Tile"]]):
                     )
                     self.render()
 
-                    if self.gifer:
-                        self.gifer.add_img(pg.image.tostring(self.screen, "RGBA"))
-
-        for y in range(1, c.ROWS - 1):
-            for x in range(1, c.COLS - 1):
-                tile = self[x, y]
-                tile.f_weight = {}
-                if tile.status != "wall":
-                    tile.neighbours = self.get_not_wall_neighbours(tile)
-                    if tile.status != "way":
-                        tile.upd_texture("unchecked_way")
-
-        pairs = [(routes[i], routes[i + 1]) for i in range(len(routes) - 1)]
-
-        ways = []
-        for pair in pairs:
-            if mark_tiles(*pair):
-                ways.append(find_way_in_marked(*pair))
-
-        render_ways(ways)
-
+                    self.capture_frame()
+            self.capture_frame(force=True)
+
+        self.grid.set_status(np.flatnonzero(status == CHECKED_WAY),
+                             UNCHECKED_WAY)
+        self.grid.reset_dist()
+
+        points = [self.grid.index(tile.x, tile.y) for tile in routes]
+        pairs = [(points[i], points[i + 1]) for i in range(len(points) - 1)]
+
+        plan = (c.PLAN_ROUTE if plan is None else plan) and len(points) > 2
+        solver = solver or c.SOLVER
+        if solver == "lee" and not plan:
+            maze = self.distances.sync(self.grid)
+            starts, cells = maze.get_adjacency_lists()
+            ways = []
+            for pair in pairs:
+                pair = tuple(map(maze.to_flat, pair))
+                if parents := mark_tiles(*pair):
+                    ways.append(find_way_in_marked(pair[1], parents))
+
+            render_ways(ways)
+
+            print("fin")
+            return
+
+        maze = self.distances.sync(self.grid)
+        if plan:
+            route_plan = plan_route(
+                maze, points,
+                field=lambda point: self.distances.field(self.grid, point))
+            print(f"Порядок точек: {route_plan.order}, "
+                  f"длина маршрута: {route_plan.length}")
+            print(self.distances.stats())
+            ways, visited = route_plan.ways, route_plan.visited
+        elif solver == "cached":
+            ways = [way for pair in pairs
+                    if (way := self.distances.path(self.grid, *pair))]
+            print(self.distances.stats())
+            visited = np.zeros((self.grid.rows, self.grid.cols), dtype=bool)
+        elif c.PARALLEL_SOLVE:
+            if self.segment_pool is None:
+                self.segment_pool = SegmentPool(c.SOLVE_WORKERS)
+            ways, visited = self.segment_pool.solve_route(
+                maze, self.grid.version, points, solver)
+        else:
+            ways, visited = solve_route(maze, points, solver)
+
+        if len(ways) < len(pairs):
+            print("NO WAY")
+        self.grid.set_status(
+            np.flatnonzero(visited.reshape(-1) & (status == UNCHECKED_WAY)),
+            CHECKED_WAY)
+        for way in ways:
+            self.grid.set_status(way, WAY)
+
+        self.render()
+        self.capture_frame(force=True)
         print("fin")
 
     def save_to_txt(self, wall="▓▓", way="░░", filename="maze.txt") -> None:
         """
-        Функция сохранения лабиринта в txt формат
+        Функция сохранения лабиринта в txt формат,
+        файлы с расширением .gz и .xz сжимаются
         :param wall: символы для обозначения стены
         :param way: символы для обозначения пути
         :param filename: название файла
         """
-        if len(wall) != len(way):
-            raise ValueError("Длина обозначения стены не может "
-                             "отличаться от длины обозначения пути")
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write(f"wall={wall}\n")
-            file.write(f"way={way}\n\n")
-            for line in self:
-                for tile in line:
-                    if tile.status == "wall":
-                        file.write(wall)
-                    else:
-                        file.write(way)
-                file.write("\n")
-
-    def save_to_png(self, filename="maze_sources\\maze.png") -> None:
+        save_txt(self.grid.status, filename, wall, way)
+
+    def save_to_png(self, filename="maze_sources\\maze.png", mode="1",
+                    cell_size=None) -> None:
         """
         Функция сохранения лабиринта в png формат
         :param filename: название файла
+        :param mode: режим картинки из maze_io.PNG_MODES
+        :param cell_size: размер клетки в пикселях, по умолчанию c.PNG_CELL_SIZE
         """
-        f_w, f_h = TileField.Tile.tiler.floor_tile_size
-        save_surface = pg.Surface((f_w * c.COLS, f_w * c.ROWS))
-        surf_rect = save_surface.get_rect()
-
-        for y, line in enumerate(self):
-            for x, tile in enumerate(line):
-                rect = pg.Rect(x * f_w, y * f_h, f_w, f_h)
-                if self[x, y].status == "wall":
-                    pg.draw.rect(save_surface, c.BLACK, rect)
-                else:
-                    pg.draw.rect(save_surface, c.WHITE, rect)
-                # save_surface.blit(texture_surface, rect)
-        img = Image.frombytes('RGBA', (surf_rect.w, surf_rect.h),
-                              pg.image.tostring(save_surface, 'RGBA'))
-        img.save(filename)
-        img.close()
+        save_png(self.grid.status, filename, cell_size or c.PNG_CELL_SIZE,
+                 mode)
 
     def load_from_txt(self, filename="maze_sources/maze.txt") -> None:
         """
-        Функция загрузки лабиранта из текстового файла
+        Функция загрузки лабиранта из текстового файла (в том числе .gz и .xz)
         :param filename: название файла
         """
-        # if filename not in os.listdir():
-        #     print("File Not Found")
-        #     return
-        with open(filename, "r", encoding="utf-8") as file:
-            wall = file.readline().split("=")[-1].replace("\n", "")
-            way = file.readline().split("=")[-1].replace("\n", "")
-            if len(wall) != len(way):
-                raise ValueError("Длина обозначения стены не может "
-                                 "отличаться от длины обозначения пути")
-            tile_len = len(wall)
-            file.readline()
-            self.clear()
-            y = 0
-            while (line := file.readline()) != "":
-                field_line = []
-                for x, inline_idx in enumerate(range(0, len(line), tile_len)):
-                    if line[inline_idx:inline_idx + tile_len] == wall:
-                        field_line.append(TileField.Tile(x, y, "wall"))
-                    elif line[inline_idx:inline_idx + tile_len] == way:
-                        field_line.append(TileField.Tile(x, y, "unchecked_way"))
-                self.append(field_line)
-                y += 1
-            c.ROWS = y
-            c.COLS = len(self[0])
-
-    def load_from_png(self, filename="maze_sources/test2.png") -> None:
+        status = load_txt(filename, self.progress_screen("Loading..."))
+        self.set_grid(MazeGrid.from_status(status, rng=self.np_rng))
+
+    def save_to_bin(self, filename="maze_sources/maze.maze",
+                    with_dist=True) -> None:
+        """
+        Функция сохранения лабиринта в бинарный формат
+        :param filename: название файла
+        :param with_dist: сохранить расстояния последнего поиска пути
+        """
+        save_bin(self.grid.status, filename,
+                 self.grid.dist if with_dist and self.grid.dist.any() else None,
+                 self.seed)
+
+    def load_from_bin(self, filename="maze_sources/maze.maze") -> None:
+        """
+        Функция загрузки лабиринта из бинарного формата
+        :param filename: название файла
+        """
+        status, dist, seed = load_bin(filename)
+        self.reseed(seed)
+        self.set_grid(MazeGrid.from_status(status, dist, self.np_rng))
+
+    def load_from_png(self, filename="maze_sources/test2.png",
+                      method=None, cell_size=None) -> None:
         """
         Функция загрузки лабиринта из картинки
         :param filename: название файла картинки
+        :param method: метод бинаризации из maze_io.BINARIZATIONS,
+        по умолчанию c.BINARIZATION
+        :param cell_size: размер клетки в пикселях картинки,
+        по умолчанию c.CELL_SIZE
         """
-        img = Image.open(filename)
-        i_w, i_h = img.size
-        img = img.resize((i_w // c.CELL_SIZE, i_h // c.CELL_SIZE),
-                         resample=Image.NEAREST)
-        img = img.convert('1')
-
-        width, height = img.size
-        self.clear()
-        c.COLS = width
-        c.ROWS = height
-
-        for y in range(height):
-            line = []
-            for x in range(width):
-                col = img.getpixel((x, y))
-                if x == 0 or x == width - 1 or y == 0 or y == height - 1:
-                    line.append(TileField.Tile(x, y, status="wall"))
-                elif col == 255:
-                    line.append(TileField.Tile(x, y, "unchecked_way"))
-                else:
-                    line.append(TileField.Tile(x, y, "wall"))
-            self.append(line)
-
-        img.close()
+        status = load_png(filename, cell_size or c.CELL_SIZE,
+                          method or c.BINARIZATION)
+        self.set_grid(MazeGrid.from_status(status, rng=self.np_rng))
 
-    def regen(self) -> None:
+    def regen(self, seed: Optional[int] = None) -> None:
         """
         Метод регенерации лабиринта
+        :param seed: зерно генерации, None - случайное
         """
-        self.walls.clear()
-        self.ways.clear()
-        super().clear()
+        self.reseed(seed)
         self.pred_gen()
         self.generate_maze()